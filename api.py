@@ -1,16 +1,36 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Request, Header
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 import os
+import asyncio
+import hmac
 import json
 import re
 import random
+import time
+from collections import OrderedDict
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
 
 from fastapi.middleware.cors import CORSMiddleware
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
 from supabase import create_client, Client
 
+from question_cache import QuestionCache
+from question_pool import QuestionPool, is_valid_question, title_key
+from single_flight import SingleFlight
+from circuit_breaker import CircuitBreaker
+from session_store import create_session_store
+from question_index import QuestionIndex
+from explanation_cache import ExplanationCache, explanation_key
+from metrics import Registry
+from job_index import JobScoreIndex
+from skill_dictionary import SkillDictionary
+from job_io import iter_job_batches
+from skill_weights import skill_weight
+
 # --- SETUP ---
 load_dotenv()
 google_api_key = os.getenv("GOOGLE_API_KEY")
@@ -38,6 +58,109 @@ llm = ChatGoogleGenerativeAI(
 
 supabase: Client = create_client(supabase_url, supabase_key)
 
+# --- METRICS ---
+# Cheap in-process counters/histograms, scraped from /metrics in Prometheus text format
+metrics = Registry()
+REQUEST_LATENCY = metrics.histogram(
+    "api_request_duration_seconds", "Latency of API requests.", ["endpoint", "status"])
+QUESTION_STAGE_LATENCY = metrics.histogram(
+    "question_stage_duration_seconds", "Time spent in each stage of serving a question.", ["stage"])
+QUESTIONS_SERVED = metrics.counter(
+    "questions_served_total", "Questions served by source (bank, pool, generated).", ["skill", "bucket", "path"])
+QUESTION_GENERATIONS = metrics.counter(
+    "question_generations_total", "LLM question generation attempts by outcome.", ["outcome"])
+PREFETCH_RESULTS = metrics.counter(
+    "question_prefetch_total", "Whether /next_question could use a prefetched question.", ["outcome"])
+LLM_REQUESTS = metrics.counter(
+    "llm_requests_total", "LLM calls by outcome.", ["outcome"])
+LLM_LATENCY = metrics.histogram(
+    "llm_request_duration_seconds", "LLM call latency, including time waiting for a slot.")
+LLM_TOKENS = metrics.counter(
+    "llm_tokens_total", "Tokens reported by the LLM.", ["direction"])
+LLM_HEDGES = metrics.counter(
+    "llm_hedges_total", "Hedged LLM requests by which call answered first.", ["winner"])
+QUESTION_FALLBACKS = metrics.counter(
+    "question_fallbacks_total", "Questions served without generation, by reason.", ["reason"])
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        REQUEST_LATENCY.observe(
+            time.perf_counter() - start,
+            endpoint=getattr(route, "path", "unmatched"),
+            status=status
+        )
+
+# --- NON-BLOCKING I/O ---
+# The Supabase client is synchronous, so queries run on a bounded thread pool instead of the
+# event loop. LLM calls use the async client, capped so a burst cannot exhaust the quota.
+db_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("DB_MAX_WORKERS", "32")),
+    thread_name_prefix="supabase"
+)
+llm_slots = asyncio.Semaphore(int(os.getenv("LLM_MAX_CONCURRENCY", "16")))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "20"))
+# Seconds before a slow question generation gets a second, identical request; 0 disables hedging
+LLM_HEDGE_AFTER = float(os.getenv("LLM_HEDGE_AFTER", "0"))
+
+async def run_blocking(fn, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, fn, *args)
+
+async def run_db(query):
+    return await run_blocking(query.execute)
+
+async def call_llm(messages):
+    start = time.perf_counter()
+    try:
+        async with llm_slots:
+            response = await asyncio.wait_for(llm.ainvoke(messages), timeout=LLM_TIMEOUT)
+    except asyncio.TimeoutError:
+        LLM_REQUESTS.inc(outcome="timeout")
+        raise TimeoutError(f"LLM did not answer within {LLM_TIMEOUT:g}s")
+    except Exception:
+        LLM_REQUESTS.inc(outcome="error")
+        raise
+    finally:
+        LLM_LATENCY.observe(time.perf_counter() - start)
+    LLM_REQUESTS.inc(outcome="ok")
+    usage = getattr(response, "usage_metadata", None) or {}
+    LLM_TOKENS.inc(usage.get("input_tokens", 0), direction="input")
+    LLM_TOKENS.inc(usage.get("output_tokens", 0), direction="output")
+    return response
+
+async def call_llm_hedged(messages):
+    """
+    call_llm, plus a second identical request if the first is still running after
+    LLM_HEDGE_AFTER seconds. The first successful answer wins and the other is cancelled.
+    """
+    if LLM_HEDGE_AFTER <= 0:
+        return await call_llm(messages)
+    primary = asyncio.ensure_future(call_llm(messages))
+    done, _ = await asyncio.wait({primary}, timeout=LLM_HEDGE_AFTER)
+    if done:
+        return primary.result()
+    hedge = asyncio.ensure_future(call_llm(messages))
+    pending = {primary, hedge}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    LLM_HEDGES.inc(winner="primary" if task is primary else "hedge")
+                    return task.result()
+        return primary.result()  # both failed: raise the primary's error
+    finally:
+        for task in (primary, hedge):
+            task.cancel()
+
 # --- MODELS ---
 class StartTestRequest(BaseModel):
     user_id: str
@@ -63,8 +186,213 @@ class ExplainRequest(BaseModel):
     correct_option_text: str
     user_option_text: str
 
+# Tests are timed rather than a fixed length; this comfortably covers one test's mistakes
+EXPLAIN_BATCH_MAX = int(os.getenv("EXPLAIN_BATCH_MAX", "50"))
+
+class ExplainBatchRequest(BaseModel):
+    items: list[ExplainRequest] = Field(max_length=EXPLAIN_BATCH_MAX)
+
+class RecommendJobsRequest(BaseModel):
+    score: int
+    role_category: Optional[str] = None
+    skill: Optional[str] = None
+    radius: int = 150
+    limit: int = 20
+
+class MatchJobsRequest(BaseModel):
+    skills: dict[str, int]  # skill name -> the user's score in it (0-1000)
+    role_category: Optional[str] = None
+    limit: int = 10
+
+class RefreshJobIndexRequest(BaseModel):
+    job_ids: Optional[list[str]] = None
+
 # --- SESSION STORE ---
-active_sessions = {}
+# "memory" for a single worker, "sqlite:///path/sessions.db" to share sessions across workers/restarts
+SESSION_TTL = float(os.getenv("SESSION_TTL", "3600"))
+SESSION_MAX = int(os.getenv("SESSION_MAX", "10000"))
+active_sessions = create_session_store(os.getenv("SESSION_STORE"), ttl=SESSION_TTL, max_sessions=SESSION_MAX)
+# Store calls may hit SQLite, so they run on the DB executor; /metrics reads this snapshot taken there
+session_stats = {}
+
+# --- QUESTION CACHE ---
+# Path A reads buckets from here instead of re-selecting the whole bucket on every call
+question_cache = QuestionCache(
+    max_buckets=int(os.getenv("QUESTION_CACHE_BUCKETS", "256")),
+    max_questions_per_bucket=int(os.getenv("QUESTION_CACHE_BUCKET_SIZE", "500")),
+    ttl=float(os.getenv("QUESTION_CACHE_TTL", "300")),
+)
+
+# --- EXPLANATION CACHE ---
+# Explanations depend only on (question, correct option, wrong option), so identical mistakes share one
+explanation_cache = ExplanationCache(
+    os.getenv("EXPLANATION_CACHE_PATH", "explanations.db"),
+    max_entries=int(os.getenv("EXPLANATION_CACHE_SIZE", "50000"))
+)
+
+# --- QUESTION SIMILARITY INDEX ---
+# Per-skill MinHash/LSH index used for near-duplicate checks across every difficulty bucket
+QUESTION_INDEX_SKILLS = int(os.getenv("QUESTION_INDEX_SKILLS", "256"))
+question_index = QuestionIndex(os.getenv("QUESTION_INDEX_DIR", ".question_index"), max_skills=QUESTION_INDEX_SKILLS)
+skill_index_tasks = OrderedDict()  # skill -> asyncio.Task building that skill's index, least recently used first
+skill_index_saves = set()  # skills with a background save running
+
+async def build_skill_index(skill: str):
+    response = await run_db(
+        supabase.table('question_bank')
+            .select('question_data')
+            .eq('skill_name', skill)
+    )
+
+    def build():
+        # Signatures loaded from disk are reused; only rows added since the last save are hashed
+        index = question_index.load(skill)
+        for row in response.data:
+            q = row['question_data']
+            index.add(q.get('question_id'), q.get('question_title', ''))
+        if index.unsaved:
+            question_index.save(skill)
+        return index
+
+    return await run_blocking(build)
+
+async def get_skill_index(skill: str):
+    task = skill_index_tasks.get(skill)
+    if task is not None and task.done() and not task.cancelled() and task.exception() is None \
+            and question_index.get(skill) is not task.result():
+        task = None  # question_index evicted it since; reload rather than keep a detached copy
+    if task is None:
+        task = asyncio.ensure_future(build_skill_index(skill))
+        skill_index_tasks[skill] = task
+    skill_index_tasks.move_to_end(skill)
+    while len(skill_index_tasks) > QUESTION_INDEX_SKILLS:
+        skill_index_tasks.popitem(last=False)
+    try:
+        return await asyncio.shield(task)
+    except Exception:
+        skill_index_tasks.pop(skill, None)
+        raise
+
+# --- JOB SCORE INDEX ---
+# Sorted per-category score arrays behind /recommend_jobs, loaded on first use and kept fresh by
+# diffing against the jobs table (all rows periodically, or just the ids score_jobs.py reports)
+JOB_INDEX_COLUMNS = "job_id, title, company, role_category, target_score, seniority_level, skills_array"
+# "1" once normalize_skills.py has added jobs.skill_ids: the index then uses the persisted skill IDs
+JOB_INDEX_SKILL_IDS = os.getenv("JOB_INDEX_SKILL_IDS", "0") == "1"
+if JOB_INDEX_SKILL_IDS:
+    JOB_INDEX_COLUMNS += ", skill_ids"
+JOB_INDEX_REFRESH_SECONDS = float(os.getenv("JOB_INDEX_REFRESH_SECONDS", "900"))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")  # shared secret for operational endpoints like /refresh_job_index
+job_index = JobScoreIndex()
+job_index_lock = asyncio.Lock()
+job_index_refresher = None
+
+def sync_job_index(job_ids=None) -> dict:
+    """
+    Runs on the DB executor. Without job_ids, rows missing from the table are dropped
+    too, and with JOB_INDEX_SKILL_IDS the skill dictionary is re-read; if it grew, the
+    index is rebuilt against it and swapped in.
+    """
+    global job_index
+    changed = 0
+    if job_ids is None and JOB_INDEX_SKILL_IDS:
+        dictionary = SkillDictionary.load(supabase)
+        if len(dictionary) != len(job_index.skills):
+            fresh = JobScoreIndex(dictionary)
+            for rows in iter_job_batches(supabase, JOB_INDEX_COLUMNS):
+                fresh.apply(rows)
+            fresh.loaded = True
+            job_index = fresh
+            return {"changed": len(fresh), "removed": 0, "jobs": len(fresh)}
+    if job_ids is None:
+        seen = set()
+        for rows in iter_job_batches(supabase, JOB_INDEX_COLUMNS):
+            seen.update(row['job_id'] for row in rows)
+            changed += job_index.apply(rows)
+        removed = job_index.remove(job_index.job_ids() - seen)
+    else:
+        job_ids = list(dict.fromkeys(job_ids))
+        found = set()
+        for i in range(0, len(job_ids), 200):
+            rows = supabase.table('jobs').select(JOB_INDEX_COLUMNS).in_('job_id', job_ids[i:i + 200]).execute().data
+            found.update(row['job_id'] for row in rows)
+            changed += job_index.apply(rows)
+        removed = job_index.remove(set(job_ids) - found)
+    job_index.loaded = True
+    return {"changed": changed, "removed": removed, "jobs": len(job_index)}
+
+async def refresh_job_index(job_ids=None) -> dict:
+    # One refresh at a time; a full load that is already running covers targeted refreshes too
+    async with job_index_lock:
+        if job_ids is not None and not job_index.loaded:
+            job_ids = None
+        return await run_blocking(sync_job_index, job_ids)
+
+async def get_job_index() -> JobScoreIndex:
+    if not job_index.loaded:
+        await refresh_job_index()
+    return job_index
+
+async def refresh_job_index_periodically():
+    while True:
+        await asyncio.sleep(JOB_INDEX_REFRESH_SECONDS)
+        if job_index.loaded:
+            try:
+                await refresh_job_index()
+            except Exception as e:
+                print(f"Job index refresh failed: {e}")
+
+# --- GENERATION GUARDS ---
+# Requests wait at most QUESTION_LATENCY_BUDGET seconds for generation before being served a fallback
+# question. After repeated failures (errors, timeouts, unparseable JSON) the breaker skips generation
+# entirely; the background pool makes the trial calls that close it again.
+QUESTION_LATENCY_BUDGET = float(os.getenv("QUESTION_LATENCY_BUDGET", "8"))
+QUESTION_FALLBACK_TIMEOUT = float(os.getenv("QUESTION_FALLBACK_TIMEOUT", "1"))
+llm_breaker = CircuitBreaker(
+    failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+    reset_timeout=float(os.getenv("LLM_BREAKER_RESET", "30")),
+)
+
+async def guarded_generation(skill: str, difficulty_bucket: int, count: int, allow_duplicate: bool = True) -> list:
+    existing_questions = await fetch_bucket(skill, difficulty_bucket)
+    try:
+        questions = await generate_questions(skill, difficulty_bucket, existing_questions, count, allow_duplicate)
+    except Exception:
+        llm_breaker.record_failure()
+        raise
+    llm_breaker.record_success()
+    return questions
+
+# --- QUESTION POOL ---
+# Background producer that keeps questions ready for buckets that recently fell through to generation
+async def produce_pooled_question(skill: str, difficulty_bucket: int):
+    if not llm_breaker.allow():
+        return None
+    questions = await guarded_generation(skill, difficulty_bucket, 1, allow_duplicate=False)
+    return questions[0] if questions else None
+
+question_pool = QuestionPool(
+    produce_pooled_question,
+    target_depth=int(os.getenv("QUESTION_POOL_DEPTH", "5")),
+    concurrency=int(os.getenv("QUESTION_POOL_CONCURRENCY", "2")),
+    rate_per_minute=float(os.getenv("QUESTION_POOL_RATE_PER_MIN", "30")),
+    max_hot_buckets=int(os.getenv("QUESTION_POOL_HOT_BUCKETS", "64")),
+)
+
+# --- COLD-BUCKET GENERATION ---
+# Concurrent misses on one (skill, bucket) share a single LLM call that generates a batch of questions,
+# one per waiter; questions left over go to the pool for whoever asks next
+async def generate_bucket_batch(key, count: int):
+    skill, difficulty_bucket = key
+    with QUESTION_STAGE_LATENCY.time(stage="generate"):
+        return await guarded_generation(skill, difficulty_bucket, count)
+
+question_flights = SingleFlight(
+    generate_bucket_batch,
+    batch_size=int(os.getenv("QUESTION_BATCH_SIZE", "3")),
+    max_batch_size=int(os.getenv("QUESTION_BATCH_MAX", "8")),
+    on_leftover=lambda key, question: question_pool.put(key[0], key[1], question),
+)
 
 # --- HELPERS ---
 def clean_llm_json(llm_text: str) -> str:
@@ -72,6 +400,8 @@ def clean_llm_json(llm_text: str) -> str:
     llm_text = re.sub(r'```$', '', llm_text.strip(), flags=re.MULTILINE)
     return llm_text
 
+DIFFICULTY_BUCKETS = (20, 40, 60, 80, 100)
+
 def normalize_difficulty(level: float) -> int:
     lvl = int(level)
     if lvl <= 20: return 20
@@ -80,7 +410,211 @@ def normalize_difficulty(level: float) -> int:
     if lvl <= 80: return 80
     return 100
 
-async def get_or_create_question(skill: str, raw_level: float, history: list):
+def compute_next_level(level: float, is_correct: bool, time_taken: float) -> float:
+    time_factor = max(0.5, min(1.5, 30 / (time_taken + 1)))
+
+    if is_correct:
+        increase = 10.0 * time_factor
+        return min(100.0, level + increase)
+    decrease = 5.0 / time_factor
+    return max(0.0, level - decrease)
+
+async def fetch_bucket(skill: str, difficulty_bucket: int) -> list:
+    cached = question_cache.get(skill, difficulty_bucket)
+    if cached is not None:
+        return cached
+
+    with QUESTION_STAGE_LATENCY.time(stage="db_fetch"):
+        response = await run_db(
+            supabase.table('question_bank')
+                .select('question_data')
+                .eq('skill_name', skill)
+                .eq('difficulty_level', difficulty_bucket)
+        )
+
+    questions = [r['question_data'] for r in response.data]
+    question_cache.set(skill, difficulty_bucket, questions)
+    return questions
+
+async def generate_questions(skill: str, difficulty_bucket: int, existing_questions: list, count: int = 1,
+                             allow_duplicate: bool = True) -> list:
+    """
+    Asks the LLM for `count` new questions in one call, rejects near-duplicates of
+    any question of the skill (and of each other) and stores the rest in the
+    question bank with a single insert. If a whole batch is duplicates it retries
+    once, steered away from the titles it collided with; after that the duplicates
+    are returned unstored, or nothing if allow_duplicate is False.
+    """
+    existing_titles = [q.get('question_title', '')[:100] for q in existing_questions]
+    with QUESTION_STAGE_LATENCY.time(stage="index_load"):
+        skill_index = await get_skill_index(skill)
+    rejected_titles = []
+    duplicates = []
+
+    for attempt in range(2):
+        question_types = [
+            "Conceptual Understanding",
+            "Code Output Prediction",
+            "Debugging",
+            "Real-world Application",
+            "Best Practices"
+        ]
+        selected_types = [random.choice(question_types) for _ in range(count)]
+        
+        negative_constraint = ""
+        sample = []
+        if rejected_titles:
+            # After duplicates, steer away from exactly the questions they collided with
+            for title in rejected_titles[:2]:
+                sample.extend(skill_index.most_similar_titles(title, k=3))
+        elif existing_titles:
+            sample = random.sample(existing_titles, min(3 + count, len(existing_titles)))
+        if sample:
+            negative_constraint = f"DO NOT generate questions similar to: {json.dumps(sample)}"
+
+        prompt = ChatPromptTemplate.from_template("""
+        You are an expert technical interviewer.
+        Target Skill: **{skill}**
+        Target Level: **{level}/100**
+        Question Styles (one per question): **{q_types}**
+        
+        Instructions:
+        1. Generate {count} multiple choice questions, each testing something different.
+        2. {exclusions}
+        3. MANDATORY: If code is involved, wrap it in markdown code blocks inside 'question_title'.
+        4. **Include a short 'explanation' field** (max 2 sentences) describing why the correct answer is right.
+        5. Return ONLY a JSON array of {count} objects.
+
+        JSON Structure of each object:
+        {{
+            "question_id": 0, 
+            "question_title": "Question... \\n\\n ```lang\\n code \\n```",
+            "options": {{ "opt1": "...", "opt2": "...", "opt3": "...", "opt4": "..." }},
+            "correct_answer": "optX",
+            "explanation": "Brief explanation of why optX is correct.",
+            "difficulty": {level}
+        }}
+        """)
+
+        formatted_prompt = prompt.format_messages(
+            skill=skill,
+            level=difficulty_bucket,
+            q_types=", ".join(selected_types),
+            count=count,
+            exclusions=negative_constraint
+        )
+        
+        with QUESTION_STAGE_LATENCY.time(stage="llm"):
+            ai_response = await call_llm_hedged(formatted_prompt)
+        try:
+            with QUESTION_STAGE_LATENCY.time(stage="parse"):
+                cleaned_json = clean_llm_json(ai_response.content)
+                batch = json.loads(cleaned_json)
+        except ValueError:
+            QUESTION_GENERATIONS.inc(outcome="invalid_json")
+            raise
+        if isinstance(batch, dict):
+            batch = [batch]
+
+        # Check Duplicates, against the skill's index and within the batch
+        accepted = []
+        with QUESTION_STAGE_LATENCY.time(stage="duplicate_check"):
+            for question_data in batch:
+                if not is_valid_question(question_data):
+                    QUESTION_GENERATIONS.inc(outcome="invalid_question")
+                    continue
+                # IDs are assigned here: the model cannot know which ones are taken
+                question_data["question_id"] = random.randint(100000, 999999)
+                question_data["difficulty"] = difficulty_bucket
+                key = title_key(question_data)
+                if skill_index.is_duplicate(question_data['question_title']) or any(title_key(q) == key for q in accepted):
+                    QUESTION_GENERATIONS.inc(outcome="duplicate")
+                    rejected_titles.append(question_data['question_title'])
+                    duplicates.append(question_data)
+                else:
+                    QUESTION_GENERATIONS.inc(outcome="accepted")
+                    accepted.append(question_data)
+
+        if accepted:
+            await store_questions(skill, difficulty_bucket, accepted, skill_index)
+            return accepted
+
+    return duplicates[:count] if allow_duplicate else [] # Fallback
+
+async def store_questions(skill: str, difficulty_bucket: int, questions: list, skill_index):
+    try:
+        with QUESTION_STAGE_LATENCY.time(stage="db_insert"):
+            await run_db(supabase.table('question_bank').insert([
+                {"skill_name": skill, "difficulty_level": difficulty_bucket, "question_data": q}
+                for q in questions
+            ]))
+    except Exception as e:
+        # Still served to the users waiting on them, just not banked
+        QUESTION_GENERATIONS.inc(len(questions), outcome="insert_failed")
+        print(f"ERROR: storing {len(questions)} generated {skill} questions failed: {str(e)}")
+        return
+    for question_data in questions:
+        question_cache.add(skill, difficulty_bucket, question_data)
+        skill_index.add(question_data['question_id'], question_data['question_title'])
+    if skill_index.unsaved >= 25 and skill not in skill_index_saves:
+        # One save per skill at a time; questions added meanwhile go out with the next one
+        skill_index_saves.add(skill)
+        save = asyncio.get_running_loop().run_in_executor(db_executor, question_index.save, skill)
+        save.add_done_callback(lambda f: _finish_index_save(skill, f))
+
+def _finish_index_save(skill: str, future):
+    skill_index_saves.discard(skill)
+    if not future.cancelled() and future.exception() is not None:
+        print(f"ERROR: saving the {skill} question index failed: {str(future.exception())}")
+
+async def fallback_question(skill: str, difficulty_bucket: int, seen_ids: set, history: list):
+    """
+    Degraded path for when generation is unavailable or over budget: an unseen
+    question from this bucket or the nearest populated one, else a repeat,
+    preferring the bank over the user's own history. None if the skill has nothing.
+    """
+    buckets = sorted(DIFFICULTY_BUCKETS, key=lambda b: (abs(b - difficulty_bucket), b))
+    try:
+        banks = await asyncio.wait_for(
+            asyncio.gather(*(fetch_bucket(skill, b) for b in buckets)), timeout=QUESTION_FALLBACK_TIMEOUT
+        )
+    except Exception:
+        banks = [question_cache.get(skill, b) or [] for b in buckets]
+
+    for questions in banks:
+        candidates = [q for q in questions if str(q.get('question_id')) not in seen_ids]
+        if candidates:
+            return random.choice(candidates)
+    for questions in banks:
+        if questions:
+            return random.choice(questions)
+    answered = [item for item in history or [] if item.get("question_title")]
+    if answered:
+        item = min(answered, key=lambda i: abs((i.get("difficulty") or 0) - difficulty_bucket))
+        return {
+            "question_id": item["question_id"],
+            "question_title": item["question_title"],
+            "options": item["options"],
+            "correct_answer": item["correct_answer"],
+            "explanation": item.get("explanation", "No explanation available."),
+            "difficulty": item.get("difficulty") or difficulty_bucket,
+        }
+    return None
+
+async def get_or_create_question(skill: str, raw_level: float, history: list, prefetch: bool = False,
+                                 deadline: Optional[float] = None):
+    """
+    Paths A-D below; returns (question, path) and leaves counting the question as
+    served to the endpoint that serves it. Prefetches run in the background while
+    the user answers, so they wait for generation without a latency budget and
+    return (None, reason) instead of locking in a fallback question; the live
+    request then checks the pool again. Live requests may pass the monotonic
+    deadline their budget started from.
+    """
+    if prefetch:
+        deadline = None
+    elif deadline is None:
+        deadline = time.monotonic() + QUESTION_LATENCY_BUDGET
     difficulty_bucket = normalize_difficulty(raw_level)
     
     seen_ids = set()
@@ -90,15 +624,8 @@ async def get_or_create_question(skill: str, raw_level: float, history: list):
                 seen_ids.add(str(item["question_id"]))
 
     try:
-        # DB CHECK
-        response = supabase.table('question_bank')\
-            .select('question_data')\
-            .eq('skill_name', skill)\
-            .eq('difficulty_level', difficulty_bucket)\
-            .execute()
-        
-        existing_questions = [r['question_data'] for r in response.data]
-        existing_titles = [q.get('question_title', '')[:100] for q in existing_questions]
+        # DB CHECK (served from the in-process cache when warm)
+        existing_questions = await fetch_bucket(skill, difficulty_bucket)
         
         # PATH A: FETCH FROM DB (If deep enough)
         if len(existing_questions) >= 15: 
@@ -109,91 +636,162 @@ async def get_or_create_question(skill: str, raw_level: float, history: list):
                     candidates.append(q_data)
             
             if candidates:
-                return random.choice(candidates)
-
-        # PATH B: GENERATE NEW
-        print(f"DEBUG: Generating FRESH question (Level {difficulty_bucket})...")
-
-        for attempt in range(2):
-            question_types = [
-                "Conceptual Understanding",
-                "Code Output Prediction",
-                "Debugging",
-                "Real-world Application",
-                "Best Practices"
-            ]
-            selected_type = random.choice(question_types)
-            
-            negative_constraint = ""
-            if existing_titles:
-                sample = random.sample(existing_titles, min(3, len(existing_titles)))
-                negative_constraint = f"DO NOT generate questions similar to: {json.dumps(sample)}"
-
-            prompt = ChatPromptTemplate.from_template("""
-            You are an expert technical interviewer.
-            Target Skill: **{skill}**
-            Target Level: **{level}/100**
-            Question Style: **{q_type}**
-            
-            Instructions:
-            1. Generate ONE multiple choice question.
-            2. {exclusions}
-            3. MANDATORY: If code is involved, wrap it in markdown code blocks inside 'question_title'.
-            4. **Include a short 'explanation' field** (max 2 sentences) describing why the correct answer is right.
-            5. Return ONLY JSON.
-
-            JSON Structure:
-            {{
-                "question_id": {qid}, 
-                "question_title": "Question... \\n\\n ```lang\\n code \\n```",
-                "options": {{ "opt1": "...", "opt2": "...", "opt3": "...", "opt4": "..." }},
-                "correct_answer": "optX",
-                "explanation": "Brief explanation of why optX is correct.",
-                "difficulty": {level}
-            }}
-            """)
-
-            temp_qid = random.randint(100000, 999999) 
-            
-            formatted_prompt = prompt.format_messages(
-                skill=skill,
-                level=difficulty_bucket,
-                q_type=selected_type,
-                exclusions=negative_constraint,
-                qid=temp_qid
-            )
-            
-            ai_response = llm.invoke(formatted_prompt)
-            cleaned_json = clean_llm_json(ai_response.content)
-            question_data = json.loads(cleaned_json)
-            question_data["difficulty"] = difficulty_bucket
-
-            # Check Duplicates
-            is_duplicate = False
-            new_title_clean = question_data['question_title'].replace(' ', '').lower()
-            for existing in existing_questions:
-                existing_title_clean = existing.get('question_title', '').replace(' ', '').lower()
-                if new_title_clean in existing_title_clean:
-                    is_duplicate = True
-                    break
-            
-            if not is_duplicate:
-                try:
-                    supabase.table('question_bank').insert({
-                        "skill_name": skill,
-                        "difficulty_level": difficulty_bucket,
-                        "question_data": question_data
-                    }).execute()
-                except Exception:
-                    pass
-                return question_data
-            
-        return question_data # Fallback
+                return random.choice(candidates), "bank"
+
+        # PATH B: SERVE FROM THE PRE-GENERATED POOL
+        pooled = question_pool.take(skill, difficulty_bucket, seen_ids)
+        if pooled:
+            return pooled, "pool"
+
+        # PATH C: COLD MISS, GENERATE NEW (joining the bucket's in-flight batch if there is one)
+        # Waiting is capped by the latency budget; a batch that lands later still fills the pool
+        key = (skill, difficulty_bucket)
+        question = None
+        if question_flights.in_flight(key) or llm_breaker.allow():
+            print(f"DEBUG: Generating FRESH question (Level {difficulty_bucket})...")
+            try:
+                question = await asyncio.wait_for(
+                    question_flights.take(key, accept=lambda q: str(q.get('question_id')) not in seen_ids),
+                    timeout=None if deadline is None else max(0.0, deadline - time.monotonic())
+                )
+                reason = "exhausted"
+            except asyncio.TimeoutError:
+                reason = "over_budget"
+            except Exception as e:
+                print(f"ERROR: generating {skill} L{difficulty_bucket} failed: {str(e)}")
+                reason = "generation_failed"
+        else:
+            reason = "circuit_open"
+        if question is not None:
+            return question, "generated"
+
+        # PATH D: DEGRADED, NEAREST POPULATED BUCKET OR A REPEAT
+        if prefetch:
+            return None, reason
+        question = await fallback_question(skill, difficulty_bucket, seen_ids, history)
+        if question is None:
+            raise RuntimeError(f"No question available for {skill} (level {difficulty_bucket}): {reason}")
+        QUESTION_FALLBACKS.inc(reason=reason)
+        return question, "fallback"
 
     except Exception as e:
         print(f"ERROR: {str(e)}")
         raise e
 
+# --- SPECULATIVE PREFETCH ---
+# While the user answers, fetch candidates for every bucket the answer could move them to
+# Tasks are process-local: a request landing on another worker simply misses and fetches normally
+prefetched_questions = OrderedDict()  # user_id -> (skill, {difficulty_bucket: asyncio.Task})
+
+def possible_next_buckets(level: float) -> set:
+    # time_factor is clamped, so the fastest and slowest answers bound each outcome
+    return {
+        normalize_difficulty(compute_next_level(level, is_correct, time_taken))
+        for is_correct in (True, False)
+        for time_taken in (0.0, float("inf"))
+    }
+
+def _consume_prefetch_error(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        print(f"PREFETCH ERROR: {str(task.exception())}")
+
+def schedule_prefetch(session: dict):
+    discard_prefetched(session["user_id"])
+    history = list(session["history"])
+    tasks = {}
+    for bucket in possible_next_buckets(float(session["current_level"])):
+        task = asyncio.create_task(get_or_create_question(session["skill"], bucket, history, prefetch=True))
+        task.add_done_callback(_consume_prefetch_error)
+        tasks[bucket] = task
+    prefetched_questions[session["user_id"]] = (session["skill"], tasks)
+    # Abandoned tests never call /end_test, so cap what they can leave behind
+    while len(prefetched_questions) > SESSION_MAX:
+        _, (_, stale) = prefetched_questions.popitem(last=False)
+        for task in stale.values():
+            task.cancel()
+
+def count_served(skill: str, level: float, path: str):
+    # Counted when a question reaches the user, so speculative prefetches never inflate it
+    QUESTIONS_SERVED.inc(skill=skill, bucket=normalize_difficulty(level), path=path)
+
+def pool_prefetched(skill: str, bucket: int, task: asyncio.Task):
+    # Finished candidates go back to the pool (kept only for hot buckets)
+    if not task.cancelled() and task.exception() is None and task.result()[0] is not None:
+        question_pool.put(skill, bucket, task.result()[0])
+
+def release_prefetched(skill: str, tasks: dict):
+    # Finished candidates are pooled, the rest are cancelled
+    for bucket, task in tasks.items():
+        if task.done():
+            pool_prefetched(skill, bucket, task)
+        else:
+            task.cancel()
+
+def discard_prefetched(user_id: str):
+    # Released under the skill they were fetched for, which may be a test the user abandoned
+    entry = prefetched_questions.pop(user_id, None)
+    if entry:
+        release_prefetched(*entry)
+
+async def take_prefetched(session: dict, new_level: float, deadline: float):
+    """
+    The prefetched (question, path) for the bucket the answer landed in, waiting
+    for it at most until deadline. A prefetch still running then is left to finish
+    into the pool, and the caller serves the request through get_or_create_question.
+    """
+    entry = prefetched_questions.pop(session["user_id"], None)
+    if not entry:
+        return None
+    skill, tasks = entry
+    if skill != session["skill"]:
+        release_prefetched(skill, tasks)
+        return None
+    bucket = normalize_difficulty(new_level)
+    task = tasks.pop(bucket, None)
+    release_prefetched(skill, tasks)
+    if task is None:
+        return None
+    try:
+        question, path = await asyncio.wait_for(asyncio.shield(task), timeout=max(0.0, deadline - time.monotonic()))
+    except asyncio.TimeoutError:
+        task.add_done_callback(lambda t: pool_prefetched(skill, bucket, t))
+        return None
+    except Exception:
+        return None
+    return (question, path) if question is not None else None
+
+# --- STATE GAUGES (evaluated at scrape time) ---
+metrics.gauge("active_sessions", "Tests currently in progress.", callback=lambda: session_stats.get("sessions", 0))
+metrics.gauge("session_store_events", "Session store size, idle expirations and evictions at the cap.", ["event"],
+              callback=lambda: {(k,): v for k, v in session_stats.items()})
+metrics.gauge("question_cache_events", "Question cache counters.", ["event"],
+              callback=lambda: {(k,): v for k, v in question_cache.stats().items()})
+metrics.gauge("question_pool_state", "Question pool depth and in-flight generations.", ["state"],
+              callback=lambda: {(k,): v for k, v in question_pool.stats().items()})
+metrics.gauge("question_flight_events", "Cold-bucket generation flights and how many misses they absorbed.", ["event"],
+              callback=lambda: {(k,): v for k, v in question_flights.stats().items()})
+metrics.gauge("llm_breaker_state", "LLM circuit breaker: whether it is open, and how often it opened or rejected.", ["event"],
+              callback=lambda: {(k,): v for k, v in llm_breaker.stats().items()})
+metrics.gauge("explanation_cache_events", "Explanation cache counters.", ["event"],
+              callback=lambda: {(k,): v for k, v in explanation_cache.stats().items()})
+metrics.gauge("job_index_size", "Jobs and categories in the recommendation index.", ["kind"],
+              callback=lambda: {(k,): v for k, v in job_index.stats().items()})
+
+# --- LIFECYCLE ---
+@app.on_event("startup")
+async def start_background_workers():
+    global job_index_refresher
+    await question_pool.start()
+    job_index_refresher = asyncio.create_task(refresh_job_index_periodically())
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    await question_pool.stop()
+    if job_index_refresher:
+        job_index_refresher.cancel()
+    question_index.save_all()
+    db_executor.shutdown(wait=False)
+
 # --- ENDPOINTS ---
 
 @app.post("/start_test")
@@ -206,10 +804,12 @@ async def start_test(req: StartTestRequest):
         "correct_answers": 0,
         "history": [] 
     }
-    active_sessions[req.user_id] = user_session
+    await run_blocking(active_sessions.put, req.user_id, user_session)
+    discard_prefetched(req.user_id)
 
     try:
-        question = await get_or_create_question(req.skill, req.self_rating, [])
+        question, path = await get_or_create_question(req.skill, req.self_rating, [])
+        count_served(req.skill, req.self_rating, path)
         user_session["history"].append({
             "question_id": question["question_id"],
             "question_title": question["question_title"],
@@ -221,6 +821,8 @@ async def start_test(req: StartTestRequest):
         })
         user_session["last_question"] = question
         user_session["questions_asked"] += 1
+        await run_blocking(active_sessions.put, req.user_id, user_session)
+        schedule_prefetch(user_session)
         return question
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Start failed: {str(e)}")
@@ -228,7 +830,7 @@ async def start_test(req: StartTestRequest):
 
 @app.post("/next_question")
 async def next_question(req: AnswerRequest):
-    session = active_sessions.get(req.user_id)
+    session = await run_blocking(active_sessions.get, req.user_id)
     if not session:
         raise HTTPException(status_code=404, detail="No active test found.")
 
@@ -237,21 +839,25 @@ async def next_question(req: AnswerRequest):
             q["user_answer"] = req.selected_option
             break
 
-    level = float(session["current_level"])
-    time_factor = max(0.5, min(1.5, 30 / (req.time_taken + 1)))
-
-    if req.selected_option == req.correct_answer:
-        increase = 10.0 * time_factor
-        new_level = min(100.0, level + increase)
+    is_correct = req.selected_option == req.correct_answer
+    new_level = compute_next_level(float(session["current_level"]), is_correct, req.time_taken)
+    if is_correct:
         session["correct_answers"] += 1
-    else:
-        decrease = 5.0 / time_factor
-        new_level = max(0.0, level - decrease)
 
     session["current_level"] = new_level
+    await run_blocking(active_sessions.put, req.user_id, session)
 
     try:
-        question = await get_or_create_question(session["skill"], new_level, session["history"])
+        # One latency budget covers waiting on the prefetch and, if that misses, serving it afresh
+        deadline = time.monotonic() + QUESTION_LATENCY_BUDGET
+        prefetched = await take_prefetched(session, new_level, deadline)
+        PREFETCH_RESULTS.inc(outcome="hit" if prefetched is not None else "miss")
+        if prefetched is not None:
+            question, path = prefetched
+        else:
+            question, path = await get_or_create_question(session["skill"], new_level, session["history"],
+                                                          deadline=deadline)
+        count_served(session["skill"], new_level, path)
         session["history"].append({
             "question_id": question["question_id"],
             "question_title": question["question_title"],
@@ -263,15 +869,18 @@ async def next_question(req: AnswerRequest):
         })
         session["last_question"] = question
         session["questions_asked"] += 1
+        await run_blocking(active_sessions.put, req.user_id, session)
+        schedule_prefetch(session)
         return question
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Next question failed: {str(e)}")
 
 @app.post("/end_test")
 async def end_test(req: EndTestRequest):
-    session = active_sessions.pop(req.user_id, None)
+    session = await run_blocking(active_sessions.pop, req.user_id)
     if not session:
         raise HTTPException(status_code=404, detail="No active test found.")
+    discard_prefetched(req.user_id)
     
     accuracy = (session["correct_answers"] / max(1, session["questions_asked"])) * 50
     difficulty_bonus = (session["current_level"] / 100) * 50
@@ -286,11 +895,7 @@ async def end_test(req: EndTestRequest):
     }
 
 # --- NEW: ON-DEMAND EXPLANATION ---
-@app.post("/explain_mistake")
-async def explain_mistake(req: ExplainRequest):
-    """
-    Generates a personalized explanation for why the user was wrong.
-    """
+async def generate_explanation(req: ExplainRequest) -> str:
     prompt = ChatPromptTemplate.from_template("""
     The user answered a technical interview question incorrectly.
     
@@ -310,5 +915,88 @@ async def explain_mistake(req: ExplainRequest):
         user_text=req.user_option_text
     )
     
-    response = llm.invoke(formatted_prompt)
-    return {"explanation": response.content}
\ No newline at end of file
+    response = await call_llm(formatted_prompt)
+    return response.content
+
+async def get_explanation(req: ExplainRequest) -> str:
+    key = explanation_key(req.question_title, req.correct_option_text, req.user_option_text)
+    cached = await run_blocking(explanation_cache.get, key)
+    if cached is not None:
+        return cached
+
+    explanation = await generate_explanation(req)
+    await run_blocking(explanation_cache.put, key, explanation)
+    return explanation
+
+@app.post("/explain_mistake")
+async def explain_mistake(req: ExplainRequest):
+    """
+    Generates a personalized explanation for why the user was wrong.
+    """
+    return {"explanation": await get_explanation(req)}
+
+@app.post("/explain_mistakes")
+async def explain_mistakes(req: ExplainBatchRequest):
+    """
+    Batch variant of /explain_mistake for every wrong answer of a test. Cache misses
+    are generated concurrently; explanations come back in request order.
+    """
+    unique = {}
+    for item in req.items:
+        key = explanation_key(item.question_title, item.correct_option_text, item.user_option_text)
+        unique.setdefault(key, item)
+
+    keys = list(unique)
+    results = await asyncio.gather(*(get_explanation(unique[k]) for k in keys), return_exceptions=True)
+    by_key = {}
+    for key, result in zip(keys, results):
+        by_key[key] = None if isinstance(result, Exception) else result
+
+    return {
+        "explanations": [
+            by_key[explanation_key(item.question_title, item.correct_option_text, item.user_option_text)]
+            for item in req.items
+        ]
+    }
+
+@app.post("/recommend_jobs")
+async def recommend_jobs(req: RecommendJobsRequest):
+    """
+    Jobs whose target_score is within ±radius of the user's score, optionally limited
+    to one role_category and/or jobs listing a skill, each tagged Qualified/Reach/Gap.
+    """
+    if req.radius < 0 or not 1 <= req.limit <= 200:
+        raise HTTPException(status_code=400, detail="radius must be >= 0 and limit between 1 and 200")
+    index = await get_job_index()
+    return index.query(req.score, req.role_category, req.radius, req.limit, req.skill)
+
+@app.post("/match_jobs")
+async def match_jobs(req: MatchJobsRequest):
+    """
+    Top jobs by weighted overlap between the user's evaluated skills and each job's
+    skills_array, weighted by SKILL_WEIGHTS and the user's score in each skill. The
+    caller sends the scores it read from test_results under its own login; the API
+    does not look results up by user_id, since it reads them with the service key.
+    """
+    if not 1 <= req.limit <= 100:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
+    index = await get_job_index()
+    result = index.match_skills(req.skills, skill_weight, req.limit, req.role_category)
+    result["skills_used"] = req.skills
+    return result
+
+@app.post("/refresh_job_index")
+async def refresh_job_index_endpoint(req: RefreshJobIndexRequest, x_admin_token: Optional[str] = Header(None)):
+    """
+    Re-syncs the recommendation index. score_jobs.py posts the job_ids it rewrote;
+    an empty body re-reads the whole table. Needs the X-Admin-Token header to match
+    ADMIN_TOKEN; without ADMIN_TOKEN set, only the periodic refresh runs.
+    """
+    if not ADMIN_TOKEN or not hmac.compare_digest(x_admin_token or "", ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required.")
+    return await refresh_job_index(req.job_ids)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    session_stats.update(await run_blocking(active_sessions.stats))
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
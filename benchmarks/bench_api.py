@@ -0,0 +1,152 @@
+"""
+Load test for the adaptive test API, fully offline.
+
+Drives /start_test -> N x /next_question -> /end_test flows against api.app at a
+configurable concurrency, with Gemini and Supabase replaced by in-process fakes.
+
+    python benchmarks/bench_api.py --users 200 --concurrency 50 --questions 10
+    python benchmarks/bench_api.py --cold --llm-latency 1.5 --max-p95 4.0
+    python benchmarks/bench_api.py --bank-depth 5 --llm-failure-rate 1.0 --max-p95 2.0
+
+A cold bank has nothing to fall back to, so the first questions of each bucket
+wait for generation: one LLM round plus bank and index I/O, and a second round
+when more users arrive than a batch holds. The cold gate leaves room for both.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fakes import FakeLLM, FakeSupabase, import_offline
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies, elapsed):
+    report = {}
+    for endpoint, values in sorted(latencies.items()):
+        values = sorted(values)
+        report[endpoint] = {
+            "count": len(values),
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+            "max_ms": values[-1] * 1000,
+            "throughput_rps": len(values) / elapsed if elapsed else 0.0,
+        }
+    return report
+
+
+async def run_user(client, user_id, skill, questions, latencies, errors, rng):
+    async def call(endpoint, payload):
+        start = time.perf_counter()
+        response = await client.post(endpoint, json=payload)
+        latencies[endpoint].append(time.perf_counter() - start)
+        if response.status_code != 200:
+            errors[endpoint] += 1
+            return None
+        return response.json()
+
+    question = await call("/start_test", {"user_id": user_id, "skill": skill, "self_rating": rng.randint(0, 100)})
+    level = 50.0
+    for _ in range(questions):
+        if question is None:
+            return
+        selected = rng.choice(list(question["options"]))
+        question = await call("/next_question", {
+            "user_id": user_id,
+            "question_id": question["question_id"],
+            "selected_option": selected,
+            "time_taken": rng.uniform(2, 60),
+            "previous_level": level,
+            "correct_answer": question["correct_answer"],
+        })
+    await call("/end_test", {"user_id": user_id, "skill": skill})
+
+
+async def main(args):
+    llm = FakeLLM(latency=args.llm_latency, jitter=args.llm_latency * 0.2, failure_rate=args.llm_failure_rate, seed=args.seed)
+    db = FakeSupabase(latency=args.db_latency, seed=args.seed)
+    skills = [f"Skill{i}" for i in range(args.skills)]
+    if not args.cold:
+        db.seed_question_bank(skills, per_bucket=args.bank_depth)
+
+    api = import_offline("api", supabase_client=db, llm=llm)
+    rng = random.Random(args.seed)
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    slots = asyncio.Semaphore(args.concurrency)
+
+    async def bounded(i, client):
+        async with slots:
+            await run_user(client, f"user-{i}", rng.choice(skills), args.questions, latencies, errors, rng)
+
+    await api.start_background_workers()
+    try:
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            start = time.perf_counter()
+            await asyncio.gather(*(bounded(i, client) for i in range(args.users)))
+            elapsed = time.perf_counter() - start
+    finally:
+        await api.stop_background_workers()
+
+    report = {
+        "config": vars(args),
+        "elapsed_s": elapsed,
+        "requests": sum(len(v) for v in latencies.values()),
+        "errors": dict(errors),
+        "llm_calls": llm.calls,
+        "db_executes": db.executes,
+        "endpoints": summarize(latencies, elapsed),
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['requests']} requests in {elapsed:.2f}s "
+              f"({report['requests'] / elapsed:.1f} req/s), "
+              f"{llm.calls} LLM calls, {db.executes} DB calls, errors: {dict(errors) or 'none'}")
+        print(f"{'endpoint':<16}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'req/s':>9}")
+        for endpoint, row in report["endpoints"].items():
+            print(f"{endpoint:<16}{row['count']:>8}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}"
+                  f"{row['p99_ms']:>10.1f}{row['max_ms']:>10.1f}{row['throughput_rps']:>9.1f}")
+
+    # Regression gate for CI: fail if any endpoint's p95 exceeds the budget or requests failed
+    failed = bool(errors)
+    if args.max_p95 is not None:
+        for endpoint, row in report["endpoints"].items():
+            if row["p95_ms"] > args.max_p95 * 1000:
+                print(f"FAIL: {endpoint} p95 {row['p95_ms']:.1f}ms > {args.max_p95 * 1000:.0f}ms")
+                failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100, help="number of simulated test-takers")
+    parser.add_argument("--concurrency", type=int, default=25, help="users running at the same time")
+    parser.add_argument("--questions", type=int, default=10, help="/next_question calls per user")
+    parser.add_argument("--skills", type=int, default=5, help="distinct skills the users pick from")
+    parser.add_argument("--llm-latency", type=float, default=0.8, help="fake Gemini latency in seconds")
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0)
+    parser.add_argument("--db-latency", type=float, default=0.02, help="fake Supabase latency in seconds")
+    parser.add_argument("--cold", action="store_true", help="start with an empty question bank (exercises generation)")
+    parser.add_argument("--bank-depth", type=int, default=20,
+                        help="questions seeded per bucket; below 15 requests fall through to generation or fallback")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--max-p95", type=float, default=None, help="fail if any endpoint p95 exceeds this many seconds")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,86 @@
+"""
+Per-job extraction benchmark for the Naukri scraper, against the saved fixture
+pages in job_scraping/fixtures (served locally, so no network is involved).
+
+Loads every fixture job page --rounds times with each extraction mode (field by
+field over the DOM, or one in-page evaluate), with and without resource
+blocking, checks that all modes extract identical jobs, and reports time per job.
+
+    python benchmarks/bench_extract.py --rounds 20
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fakes import ROOT
+
+sys.path.insert(0, os.path.join(ROOT, "job_scraping"))
+from scrape import (EXTRACTORS, FIXTURES_DIR, USER_AGENT, VIEWPORT, block_heavy_resources,
+                    serve_fixtures)
+from playwright.async_api import async_playwright
+
+
+async def run_mode(browser, urls, extract, block, rounds):
+    context = await browser.new_context(user_agent=USER_AGENT, viewport=VIEWPORT)
+    if block:
+        await block_heavy_resources(context)
+    page = await context.new_page()
+    extract_job = EXTRACTORS[extract]
+    timings, jobs = [], []
+    for _ in range(rounds):
+        for url in urls:
+            start = time.perf_counter()
+            job = await extract_job(page, url)
+            timings.append(time.perf_counter() - start)
+            jobs.append(job)
+    await context.close()
+    return timings, jobs
+
+
+async def main(args):
+    server, base_url = serve_fixtures(quiet=True)
+    urls = [f"{base_url}/{os.path.basename(path)}"
+            for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "job-*.html")))]
+
+    results = {}
+    reference = None
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        for extract in sorted(EXTRACTORS):
+            for block in (False, True):
+                name = f"{extract}{'+block' if block else ''}"
+                await run_mode(browser, urls, extract, block, 1)  # warm-up
+                timings, jobs = await run_mode(browser, urls, extract, block, args.rounds)
+                jobs = jobs[:len(urls)]
+                if reference is None:
+                    reference = jobs
+                elif jobs != reference:
+                    print(f"MISMATCH: {name} extracted different fields than {sorted(EXTRACTORS)[0]}")
+                    sys.exit(1)
+                results[name] = {
+                    "jobs": len(timings),
+                    "mean_ms": round(statistics.mean(timings) * 1000, 2),
+                    "p95_ms": round(sorted(timings)[int(len(timings) * 0.95) - 1] * 1000, 2),
+                }
+        await browser.close()
+    server.shutdown()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{len(urls)} fixture pages x {args.rounds} rounds; all modes extracted identical jobs")
+    for name, stats in results.items():
+        print(f"  {name:16} {stats['mean_ms']:8.2f} ms/job mean   {stats['p95_ms']:8.2f} ms p95")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=10, help="times each fixture page is extracted per mode")
+    parser.add_argument("--json", action="store_true")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,97 @@
+"""
+Parity check and throughput benchmark for score_jobs' bulk scoring mode.
+
+Scores the scraped jobs CSV (replicated up to --rows) row by row with
+calculate_granular_score, in one batch with score_jobs_batch, and in one batch
+from interned skill_ids (as written by normalize_skills.py), both as columns and
+as the job dicts run_evaluation passes; fails if any score differs, and reports
+rows/second for each.
+
+    python benchmarks/bench_scoring.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fakes import ROOT, import_offline
+
+
+# NULLs and odd values the database can hand back, appended so parity covers them too
+EDGE_CASES = [
+    {"title": None, "company": None, "skills_array": None, "education_PG": None},
+    {"title": "", "company": "", "skills_array": [], "education_PG": ""},
+    {"title": "Senior Principal Architect", "company": "Google India", "skills_array": ["", None, " Rust "],
+     "education_PG": "M.Tech in Any Specialization"},
+    {"title": "Data Analyst", "company": "Two Sigma", "skills_array": ["Python"] * 40, "education_PG": "Not Required"},
+]
+
+
+def replicate(columns, rows):
+    base = len(columns["title"])
+    return {name: [values[i % base] for i in range(rows)] for name, values in columns.items()}
+
+
+def main(args):
+    score_jobs = import_offline("score_jobs")
+    columns = score_jobs.load_jobs_csv(args.csv)
+    if args.rows:
+        columns = replicate(columns, args.rows)
+    for edge in EDGE_CASES:
+        for name in ("title", "company", "skills_array", "education_PG"):
+            columns[name].append(edge[name])
+        columns["job_id"].append(None)
+    n = len(columns["title"])
+    jobs = [
+        {name: columns[name][i] for name in ("title", "company", "skills_array", "education_PG")}
+        for i in range(n)
+    ]
+
+    start = time.perf_counter()
+    row_scores = [score_jobs.calculate_granular_score(job) for job in jobs]
+    row_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch_scores = score_jobs.score_jobs_batch(columns)
+    batch_elapsed = time.perf_counter() - start
+
+    dictionary = score_jobs.SkillDictionary()
+    columns["skill_ids"] = [None if skills is None else dictionary.intern_all(skills)
+                            for skills in columns["skills_array"]]
+    start = time.perf_counter()
+    id_scores = score_jobs.score_jobs_batch(columns, dictionary)
+    id_elapsed = time.perf_counter() - start
+
+    # run_evaluation passes rows as dicts, so skill_ids has to survive to_columns too; without
+    # skills_array, a batch that fell back to the strings would score these rows differently
+    id_jobs = [dict(job, skill_ids=skill_ids, skills_array=None) for job, skill_ids in zip(jobs, columns["skill_ids"])]
+    start = time.perf_counter()
+    id_row_scores = score_jobs.score_jobs_batch(id_jobs, dictionary)
+    id_row_elapsed = time.perf_counter() - start
+
+    mismatches = [i for i, (a, b, c, d) in enumerate(zip(row_scores, batch_scores, id_scores, id_row_scores))
+                  if not a == b == c == d]
+    if not len(row_scores) == len(batch_scores) == len(id_scores) == len(id_row_scores):
+        mismatches.append(-1)
+
+    print(f"{n} jobs")
+    print(f"per-row : {row_elapsed:.3f}s ({n / row_elapsed:,.0f} rows/s)")
+    print(f"batch   : {batch_elapsed:.3f}s ({n / batch_elapsed:,.0f} rows/s), "
+          f"{row_elapsed / batch_elapsed:.1f}x")
+    print(f"skill ids: {id_elapsed:.3f}s ({n / id_elapsed:,.0f} rows/s), "
+          f"{row_elapsed / id_elapsed:.1f}x ({len(dictionary)} canonical skills)")
+    print(f"id dicts: {id_row_elapsed:.3f}s ({n / id_row_elapsed:,.0f} rows/s), "
+          f"{row_elapsed / id_row_elapsed:.1f}x")
+    if mismatches:
+        print(f"FAIL: {len(mismatches)} scores differ, first at row {mismatches[0]}")
+        return 1
+    print("parity  : OK")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default=os.path.join(ROOT, "job_scraping", "jobs.csv"))
+    parser.add_argument("--rows", type=int, default=0, help="replicate the CSV up to this many rows")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,267 @@
+"""
+In-process stand-ins for the Gemini chat model and the Supabase client, so the
+API and batch scripts can be driven offline with configurable latency.
+"""
+import asyncio
+import copy
+import itertools
+import json
+import os
+import random
+import re
+import secrets
+import sys
+import tempfile
+import threading
+import time
+import importlib
+from types import SimpleNamespace
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# --- LLM ---
+class FakeLLM:
+    """Mimics ChatGoogleGenerativeAI.invoke/ainvoke with a fixed latency plus jitter."""
+
+    def __init__(self, latency=0.5, jitter=0.1, failure_rate=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._ids = itertools.count(100000)
+
+    def _delay(self):
+        return max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+
+    def _respond(self, messages):
+        self.calls += 1
+        if self._rng.random() < self.failure_rate:
+            raise RuntimeError("fake LLM failure")
+        prompt = " ".join(getattr(m, "content", str(m)) for m in messages)
+        if "multiple choice question" in prompt:
+            # Batch prompts ask for "Generate N multiple choice questions" and get a JSON array back
+            batch = re.search(r"Generate (\d+) multiple choice questions", prompt)
+            questions = [self._question() for _ in range(int(batch.group(1)) if batch else 1)]
+            content = "```json\n" + json.dumps(questions if batch else questions[0]) + "\n```"
+        else:
+            content = "The selected option is wrong because the other one is right."
+        return SimpleNamespace(
+            content=content,
+            usage_metadata={"input_tokens": len(prompt) // 4, "output_tokens": len(content) // 4}
+        )
+
+    def _question(self):
+        # Random tokens keep generated titles far apart for the near-duplicate index
+        title = " ".join(secrets.token_hex(4) for _ in range(10))
+        return {
+            "question_id": next(self._ids),
+            "question_title": f"Which option is correct? {title}",
+            "options": {"opt1": "A", "opt2": "B", "opt3": "C", "opt4": "D"},
+            "correct_answer": self._rng.choice(["opt1", "opt2", "opt3", "opt4"]),
+            "explanation": "Because it is.",
+            "difficulty": 0
+        }
+
+    def invoke(self, messages):
+        time.sleep(self._delay())
+        return self._respond(messages)
+
+    async def ainvoke(self, messages):
+        await asyncio.sleep(self._delay())
+        return self._respond(messages)
+
+
+# --- SUPABASE ---
+class FakeQuery:
+    def __init__(self, db, table):
+        self._db = db
+        self._table = table
+        self._columns = None
+        self._filters = []
+        self._order = None
+        self._limit = None
+        self._write = None
+
+    def select(self, columns="*", **kwargs):
+        if columns.strip() != "*":
+            # Embedded resources ("skills(name)") come back whole under their table name
+            self._columns = [c.strip().split("(")[0] for c in columns.split(",")]
+        return self
+
+    def eq(self, column, value):
+        self._filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def gt(self, column, value):
+        self._filters.append(lambda row: row.get(column) is not None and row.get(column) > value)
+        return self
+
+    def lt(self, column, value):
+        self._filters.append(lambda row: row.get(column) is not None and row.get(column) < value)
+        return self
+
+    def in_(self, column, values):
+        values = set(values)
+        self._filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def order(self, column, desc=False):
+        self._order = (column, desc)
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def insert(self, rows):
+        self._write = ("insert", rows if isinstance(rows, list) else [rows])
+        return self
+
+    def upsert(self, rows, **kwargs):
+        self._write = ("upsert", rows if isinstance(rows, list) else [rows])
+        return self
+
+    def delete(self):
+        self._write = ("delete", None)
+        return self
+
+    def execute(self):
+        self._db.wait()
+        if self._write and self._write[0] == "delete":
+            return SimpleNamespace(data=self._db.delete(self._table, self._filters))
+        if self._write:
+            return SimpleNamespace(data=self._db.write(self._table, *self._write))
+        rows = [r for r in self._db.rows(self._table) if all(f(r) for f in self._filters)]
+        if self._order:
+            column, desc = self._order
+            rows.sort(key=lambda r: r.get(column), reverse=desc)
+        if self._limit is not None:
+            rows = rows[:self._limit]
+        if self._columns:
+            rows = [{c: r.get(c) for c in self._columns} for r in rows]
+        return SimpleNamespace(data=copy.deepcopy(rows))
+
+
+class FakeSupabase:
+    """
+    Thread-safe in-memory tables behind the subset of the supabase-py query
+    builder the repo uses. `latency` is slept (blocking) on every execute().
+    Upserts merge into existing rows by `primary_keys[table]` (default "id"; a
+    tuple of columns for composite keys).
+    """
+
+    def __init__(self, latency=0.02, primary_keys=None, failure_rate=0.0, seed=None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.primary_keys = {"jobs": "job_id"}
+        self.primary_keys.update(primary_keys or {})
+        self.tables = {}
+        self.executes = 0
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._ids = itertools.count(1)
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.executes += 1
+            fail = self._rng.random() < self.failure_rate
+        if fail:
+            raise RuntimeError("fake Supabase failure")
+
+    def rows(self, table):
+        with self._lock:
+            return list(self.tables.get(table, []))
+
+    def write(self, table, mode, rows):
+        key = self.primary_keys.get(table, "id")
+        if isinstance(key, tuple):
+            key_of = lambda row: tuple(row.get(k) for k in key)
+        else:
+            key_of = lambda row: row.get(key)
+        with self._lock:
+            existing = self.tables.setdefault(table, [])
+            index = {key_of(r): i for i, r in enumerate(existing)}
+            written = []
+            for row in copy.deepcopy(rows):
+                if mode == "insert" and isinstance(key, str) and key not in row:
+                    row[key] = next(self._ids)
+                if mode == "upsert" and key_of(row) in index:
+                    existing[index[key_of(row)]].update(row)
+                    written.append(existing[index[key_of(row)]])
+                else:
+                    index[key_of(row)] = len(existing)
+                    existing.append(row)
+                    written.append(row)
+            return copy.deepcopy(written)
+
+    def delete(self, table, filters):
+        with self._lock:
+            existing = self.tables.get(table, [])
+            deleted = [r for r in existing if all(f(r) for f in filters)]
+            self.tables[table] = [r for r in existing if not all(f(r) for f in filters)]
+            return copy.deepcopy(deleted)
+
+    def seed_question_bank(self, skills, per_bucket=20):
+        """Fills question_bank; 15 or more per bucket means every bucket is served by Path A."""
+        rows = []
+        for skill in skills:
+            for bucket in (20, 40, 60, 80, 100):
+                for i in range(per_bucket):
+                    rows.append({
+                        "skill_name": skill,
+                        "difficulty_level": bucket,
+                        "question_data": {
+                            "question_id": next(self._ids),
+                            "question_title": f"{skill} L{bucket} #{i} " + secrets.token_hex(12),
+                            "options": {"opt1": "A", "opt2": "B", "opt3": "C", "opt4": "D"},
+                            "correct_answer": "opt1",
+                            "explanation": "Seeded.",
+                            "difficulty": bucket
+                        }
+                    })
+        self.write("question_bank", "insert", rows)
+
+
+# --- IMPORT HELPERS ---
+def import_offline(module_name, supabase_client=None, llm=None, env=None):
+    """
+    Imports one of the repo's modules with its Supabase client (and Gemini model,
+    for api.py) replaced by the given fakes. Missing credentials are filled with
+    placeholders and local state files go to a temp directory.
+    """
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    state_dir = tempfile.mkdtemp(prefix="bench-")
+    defaults = {
+        "GOOGLE_API_KEY": "offline",
+        "SUPABASE_URL": "http://localhost",
+        "SUPABASE_KEY": "offline",
+        "SESSION_STORE": "memory",
+        "EXPLANATION_CACHE_PATH": os.path.join(state_dir, "explanations.db"),
+        "QUESTION_INDEX_DIR": os.path.join(state_dir, "question_index"),
+    }
+    defaults.update(env or {})
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+
+    supabase_client = supabase_client or FakeSupabase()
+    patches = [mock.patch("supabase.create_client", return_value=supabase_client)]
+    if llm is not None:
+        patches.append(mock.patch("langchain_google_genai.ChatGoogleGenerativeAI", return_value=llm))
+
+    sys.modules.pop(module_name, None)
+    for p in patches:
+        p.start()
+    try:
+        return importlib.import_module(module_name)
+    finally:
+        for p in patches:
+            p.stop()
@@ -2,6 +2,9 @@ import os
 from dotenv import load_dotenv
 from supabase import create_client, Client
 
+from keyword_matcher import KeywordMatcher
+from job_io import iter_job_batches, BulkWriter
+
 # 1. SETUP
 load_dotenv()
 url = os.getenv("SUPABASE_URL")
@@ -24,40 +27,52 @@ CATEGORIES = {
     "QA/Testing": ["qa ", "quality assurance", "test engineer", "automation tester", "selenium"]
 }
 
+# Priority check (Full Stack overrides Front/Back usually), then table order
+CATEGORY_PRIORITY = ["Full Stack"] + [cat for cat in CATEGORIES if cat != "Full Stack"]
+
+KEYWORD_CATEGORIES = {}
+for cat, keywords in CATEGORIES.items():
+    for keyword in keywords:
+        KEYWORD_CATEGORIES.setdefault(keyword, set()).add(cat)
+
+# One automaton over every keyword: a title is scanned once instead of once per keyword
+CATEGORY_MATCHER = KeywordMatcher(KEYWORD_CATEGORIES)
+
 def get_category(title):
     title_lower = title.lower()
-    
-    # Priority check (Full Stack overrides Front/Back usually)
-    for keyword in CATEGORIES["Full Stack"]:
-        if keyword in title_lower: return "Full Stack"
-        
-    for cat, keywords in CATEGORIES.items():
-        if cat == "Full Stack": continue
-        for keyword in keywords:
-            if keyword in title_lower:
-                return cat
+
+    matched = set()
+    for keyword in CATEGORY_MATCHER.find_all(title_lower):
+        matched |= KEYWORD_CATEGORIES[keyword]
+
+    for cat in CATEGORY_PRIORITY:
+        if cat in matched:
+            return cat
                 
     return "General Software Engineering" # Fallback
 
-def run_categorization():
-    print("Fetching jobs...")
-    response = supabase.table('jobs').select('job_id, title').limit(10000).execute()
-    jobs = response.data
-    
-    print(f"Categorizing {len(jobs)} jobs...")
+def run_categorization(batch_size=1000):
+    print("Streaming jobs...")
     
-    updates = []
     stats = {k: 0 for k in CATEGORIES.keys()}
     stats["General Software Engineering"] = 0
+    total = 0
     
-    for job in jobs:
-        category = get_category(job['title'])
-        stats[category] += 1
-        
-        updates.append({
-            "job_id": job['job_id'],
-            "role_category": category
-        })
+    with BulkWriter(supabase, 'jobs', label="categories") as writer:
+        for jobs in iter_job_batches(supabase, "job_id, title", batch_size=batch_size):
+            updates = []
+            for job in jobs:
+                category = get_category(job['title'] or "")
+                stats[category] += 1
+                
+                updates.append({
+                    "job_id": job['job_id'],
+                    "role_category": category
+                })
+
+            writer.add(updates)
+            total += len(jobs)
+            print(f"Categorized {total} jobs...")
     
     # Print stats so you see the distribution
     print("\n--- Job Market Distribution ---")
@@ -65,14 +80,5 @@ def run_categorization():
         print(f"{cat}: {count}")
     print("-------------------------------\n")
 
-    print("Writing to DB...")
-    chunk_size = 100
-    for i in range(0, len(updates), chunk_size):
-        chunk = updates[i:i + chunk_size]
-        try:
-            supabase.table('jobs').upsert(chunk).execute()
-        except Exception as e:
-            print(f"Error: {e}")
-
 if __name__ == "__main__":
     run_categorization()
\ No newline at end of file
@@ -0,0 +1,53 @@
+import time
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing dependency for a while instead of making every
+    request wait for it to fail.
+
+    Closed until `failure_threshold` consecutive failures, then open: allow()
+    returns False for `reset_timeout` seconds. After that one trial call is let
+    through per `reset_timeout` (half-open); a success closes the breaker, a
+    failure keeps it open.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None  # monotonic time the breaker opened or last let a trial through
+        self._counts = {"opened": 0, "rejected": 0, "trials": 0}
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open":
+            self._opened_at = time.monotonic()
+            self._counts["trials"] += 1
+            return True
+        self._counts["rejected"] += 1
+        return False
+
+    def record_success(self):
+        self._failures = 0
+        self._opened_at = None
+
+    def record_failure(self):
+        self._failures += 1
+        if self._opened_at is not None or self._failures >= self.failure_threshold:
+            if self._opened_at is None:
+                self._counts["opened"] += 1
+            self._opened_at = time.monotonic()
+
+    def stats(self):
+        return dict(self._counts, open=int(self.state != "closed"))
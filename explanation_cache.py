@@ -0,0 +1,69 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def explanation_key(question_title: str, correct_option_text: str, user_option_text: str) -> str:
+    """Content address of an explanation: identical inputs always map to the same key."""
+    payload = json.dumps([question_title, correct_option_text, user_option_text], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ExplanationCache:
+    """
+    Persistent cache of /explain_mistake answers in a SQLite file. The least
+    recently used entries are dropped once `max_entries` is exceeded.
+    """
+
+    def __init__(self, path: str, max_entries: int = 50000):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS explanations (
+                key TEXT PRIMARY KEY,
+                explanation TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS explanations_last_used ON explanations (last_used)")
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute("SELECT explanation FROM explanations WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE explanations SET last_used = ? WHERE key = ?", (time.time(), key))
+            return row[0]
+
+    def put(self, key: str, explanation: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO explanations (key, explanation, last_used) VALUES (?, ?, ?)",
+                (key, explanation, time.time())
+            )
+            self._writes += 1
+            if self._writes % 100 == 0:
+                self._conn.execute("""
+                    DELETE FROM explanations WHERE key IN (
+                        SELECT key FROM explanations ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                    )
+                """, (self.max_entries,))
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM explanations").fetchone()[0]
+        return {"entries": entries, "hits": self.hits, "misses": self.misses}
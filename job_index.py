@@ -0,0 +1,255 @@
+import heapq
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+
+from skill_dictionary import SkillDictionary
+
+ALL_CATEGORIES = "*"
+
+
+def match_status(user_score: int, job_score: int) -> str:
+    """Same bands JobRecommendations used client-side."""
+    diff = user_score - job_score
+    if diff >= -50:
+        return "Qualified"
+    if diff >= -150:
+        return "Reach"
+    return "Gap"
+
+
+class _Partition:
+    """Parallel arrays sorted by score: scores[i] belongs to job_ids[i]."""
+
+    def __init__(self):
+        self.scores = array("i")
+        self.job_ids = []
+
+    def insert(self, score, job_id):
+        i = bisect_right(self.scores, score)
+        self.scores.insert(i, score)
+        self.job_ids.insert(i, job_id)
+
+    def remove(self, score, job_id):
+        lo, hi = bisect_left(self.scores, score), bisect_right(self.scores, score)
+        i = self.job_ids.index(job_id, lo, hi)
+        del self.scores[i]
+        del self.job_ids[i]
+
+
+class JobScoreIndex:
+    """
+    In-memory index of scored jobs, partitioned by role_category (plus one
+    partition holding every job). "Jobs within ±radius of a score" is two
+    bisects on a sorted array instead of a sorted table scan per page view.
+
+    It also keeps an inverted index (skill ID -> job_ids) for match_skills().
+    Skills are interned through a SkillDictionary, so each job holds a set of
+    small ints and aliases ("ReactJS", "React.js") share one posting list.
+
+    Given the persisted dictionary (see normalize_skills.py), rows are indexed
+    from their skill_ids column; rows not normalized yet fall back to looking up
+    their skills_array, and skills missing from that dictionary are left out
+    rather than given IDs of their own that could clash with later persisted ones.
+
+    apply() takes job rows and only touches the partitions of jobs whose score,
+    category or details changed, so refreshing after score_jobs.py is cheap.
+    """
+
+    def __init__(self, dictionary: SkillDictionary = None):
+        self._jobs = {}        # job_id -> (category, score, title, company, seniority, skill_ids)
+        self._partitions = {}  # category -> _Partition
+        self._postings = {}    # skill_id -> set of job_ids
+        self.skills = dictionary if dictionary is not None else SkillDictionary()
+        self._persisted = dictionary is not None
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def _entry(self, row):
+        skill_ids = row.get('skill_ids')
+        if not self._persisted:
+            skills = frozenset(self.skills.intern_all(row.get('skills_array')))
+        elif skill_ids is not None and all(map(self.skills.has_id, skill_ids)):
+            skills = frozenset(skill_ids)
+        else:
+            skills = frozenset(self.skills.id_for(s) for s in row.get('skills_array') or [] if s) - {None}
+        return (row.get('role_category') or "Uncategorized", row['target_score'],
+                row.get('title') or "", row.get('company') or "", row.get('seniority_level'), skills)
+
+    def _link(self, job_id, entry):
+        for name in (entry[0], ALL_CATEGORIES):
+            self._partitions.setdefault(name, _Partition()).insert(entry[1], job_id)
+        for skill in entry[5]:
+            self._postings.setdefault(skill, set()).add(job_id)
+
+    def _unlink(self, job_id, entry):
+        category, score = entry[0], entry[1]
+        for name in (category, ALL_CATEGORIES):
+            partition = self._partitions[name]
+            partition.remove(score, job_id)
+            if not partition.job_ids:
+                del self._partitions[name]
+        for skill in entry[5]:
+            posting = self._postings[skill]
+            posting.discard(job_id)
+            if not posting:
+                del self._postings[skill]
+
+    def apply(self, rows) -> int:
+        """Upserts job rows (unscored ones are dropped from the index). Returns how many changed."""
+        changed = 0
+        with self._lock:
+            for row in rows:
+                job_id = row['job_id']
+                old = self._jobs.get(job_id)
+                new = self._entry(row) if row.get('target_score') is not None else None
+                if old == new:
+                    continue
+                changed += 1
+                if old is not None:
+                    self._unlink(job_id, old)
+                    del self._jobs[job_id]
+                if new is not None:
+                    self._jobs[job_id] = new
+                    self._link(job_id, new)
+        return changed
+
+    def remove(self, job_ids) -> int:
+        removed = 0
+        with self._lock:
+            for job_id in job_ids:
+                entry = self._jobs.pop(job_id, None)
+                if entry is not None:
+                    self._unlink(job_id, entry)
+                    removed += 1
+        return removed
+
+    def job_ids(self):
+        with self._lock:
+            return set(self._jobs)
+
+    def query(self, score: int, category: str = None, radius: int = 150, limit: int = 20, skill: str = None):
+        """
+        Jobs scored within [score - radius, score + radius], closest to `score`
+        first when more than `limit` match, returned in ascending score order.
+        With a skill only jobs listing it match; in_range still counts the whole window.
+        """
+        skill_id = self.skills.id_for(skill) if skill else None
+        with self._lock:
+            partition = self._partitions.get(category or ALL_CATEGORIES)
+            if partition is None:
+                return {"in_range": 0, "jobs": []}
+            scores, ids = partition.scores, partition.job_ids
+            lo, hi = bisect_left(scores, score - radius), bisect_right(scores, score + radius)
+            posting = self._postings.get(skill_id, ()) if skill else None
+
+            # Walking the window finds `limit` matches after about limit * window / len(posting) jobs;
+            # a rare skill is cheaper to pick from its posting list
+            if posting is not None and len(posting) ** 2 < limit * (hi - lo):
+                matches = []
+                for job_id in posting:
+                    entry = self._jobs[job_id]
+                    if abs(entry[1] - score) <= radius and (category is None or entry[0] == category):
+                        matches.append((job_id, entry))
+                picked = heapq.nsmallest(limit, matches, key=lambda item: (abs(item[1][1] - score), item[1][1]))
+            else:
+                # Walk outwards from the user's score so the nearest jobs are taken first
+                picked = []
+                left = bisect_left(scores, score, lo, hi) - 1
+                right = left + 1
+                while len(picked) < limit and (left >= lo or right < hi):
+                    if right >= hi or (left >= lo and score - scores[left] <= scores[right] - score):
+                        i, left = left, left - 1
+                    else:
+                        i, right = right, right + 1
+                    entry = self._jobs[ids[i]]
+                    if posting is None or skill_id in entry[5]:
+                        picked.append((ids[i], entry))
+
+        picked.sort(key=lambda item: item[1][1])
+        return {
+            "in_range": hi - lo,
+            "jobs": [
+                {
+                    "job_id": job_id,
+                    "title": title,
+                    "company": company,
+                    "role_category": category_name,
+                    "target_score": job_score,
+                    "seniority_level": seniority,
+                    "status": match_status(score, job_score),
+                }
+                for job_id, (category_name, job_score, title, company, seniority, _) in picked
+            ],
+        }
+
+    def match_skills(self, user_skills: dict, weight_fn, k: int = 10, category: str = None):
+        """
+        Top-k jobs by weighted skill overlap with a user: every skill the job lists
+        and the user was evaluated on adds weight_fn(skill) * user_score / 1000,
+        with skill the canonical name.
+
+        Posting lists are merged term-at-a-time, heaviest skill first (MaxScore
+        style). Once no job outside the current top k can catch up with the
+        remaining skills' total weight, the merge stops early; new jobs also stop
+        being admitted as soon as the remaining weight can't reach the k-th score.
+        """
+        with self._lock:
+            best_scores = {}
+            for name, user_score in user_skills.items():
+                skill_id = self.skills.id_for(name)
+                if skill_id in self._postings:
+                    score = max(0, min(1000, user_score or 0))
+                    best_scores[skill_id] = max(score, best_scores.get(skill_id, 0))
+            terms = []
+            for skill_id, user_score in best_scores.items():
+                contribution = weight_fn(self.skills.name_of(skill_id)) * user_score / 1000
+                if contribution > 0:
+                    terms.append((contribution, skill_id))
+            terms.sort(reverse=True)
+            remaining = [0.0] * (len(terms) + 1)
+            for i in range(len(terms) - 1, -1, -1):
+                remaining[i] = remaining[i + 1] + terms[i][0]
+
+            acc = {}
+            for i, (contribution, skill_id) in enumerate(terms):
+                admit_new = True
+                if len(acc) >= k:
+                    best = heapq.nlargest(k + 1, acc.values())
+                    kth = best[k - 1]
+                    runner_up = best[k] if len(best) > k else 0.0
+                    if runner_up + remaining[i] < kth:
+                        break  # the top-k set can no longer change
+                    admit_new = remaining[i] >= kth
+                for job_id in self._postings[skill_id]:
+                    if job_id in acc:
+                        acc[job_id] += contribution
+                    elif admit_new and (category is None or self._jobs[job_id][0] == category):
+                        acc[job_id] = contribution
+
+            top = heapq.nlargest(k, acc.items(), key=lambda item: item[1])
+            # Exact scores for the survivors: an early stop skips their remaining terms
+            weights = {skill_id: contribution for contribution, skill_id in terms}
+            results = []
+            for job_id, _ in top:
+                entry = self._jobs[job_id]
+                matched = [s for s in entry[5] if s in weights]
+                results.append({
+                    "job_id": job_id,
+                    "title": entry[2],
+                    "company": entry[3],
+                    "role_category": entry[0],
+                    "target_score": entry[1],
+                    "seniority_level": entry[4],
+                    "match_score": round(sum(weights[s] for s in matched), 2),
+                    "matched_skills": sorted(self.skills.name_of(s) for s in matched),
+                })
+        results.sort(key=lambda job: (-job["match_score"], job["target_score"]))
+        return {"jobs": results}
+
+    def stats(self):
+        with self._lock:
+            return {"jobs": len(self._jobs), "categories": len(self._partitions) - (ALL_CATEGORIES in self._partitions)}
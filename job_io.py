@@ -0,0 +1,261 @@
+import json
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def iter_job_batches(client, columns="*", batch_size=1000, table="jobs", key="job_id"):
+    """
+    Walks a table in `key` order using keyset pagination and yields lists of at
+    most `batch_size` rows. Each page asks for rows strictly after the last key
+    seen, so every row is visited exactly once however large the table grows, and
+    only one page is held in memory at a time.
+
+    The walk ends on an empty page, not a short one: PostgREST caps pages at its
+    max-rows setting, so a short page doesn't mean the table is exhausted.
+    """
+    if columns != "*" and key not in [c.strip() for c in columns.split(",")]:
+        columns = f"{key}, {columns}"
+
+    last_key = None
+    while True:
+        query = client.table(table).select(columns).order(key).limit(batch_size)
+        if last_key is not None:
+            query = query.gt(key, last_key)
+        rows = query.execute().data
+        if not rows:
+            return
+        yield rows
+        last_key = rows[-1][key]
+
+
+class BulkWriter:
+    """
+    Upserts rows into a table in chunks on a small thread pool.
+
+    - Chunk size adapts: it grows while chunks finish under `target_latency`
+      and shrinks after slow or failed chunks.
+    - Failed chunks are retried with exponential backoff and jitter; rows
+      that still fail are appended to `dead_letter_path` (JSON lines) so they
+      can be replayed instead of silently keeping stale values.
+    - `add` blocks once `concurrency * 2` chunks are queued, which keeps
+      memory bounded when the producer is faster than the database.
+
+    Use as a context manager, or call close() to flush and get the stats.
+    `on_written(rows)` runs after each successful chunk; if it raises, the
+    error is counted in `callback_errors` and the chunk still counts as written.
+    """
+
+    def __init__(self, client, table="jobs", concurrency=4, chunk_size=100,
+                 min_chunk_size=10, max_chunk_size=1000, target_latency=2.0,
+                 max_retries=4, base_backoff=0.5, max_backoff=30.0,
+                 dead_letter_path="failed_upserts.jsonl", report_every=5.0, label="rows",
+                 on_written=None):
+        self.client = client
+        self.table = table
+        self.chunk_size = chunk_size
+        self.min_chunk_size = min_chunk_size
+        self.max_chunk_size = max_chunk_size
+        self.target_latency = target_latency
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.dead_letter_path = dead_letter_path
+        self.report_every = report_every
+        self.label = label
+        # Called from a worker thread with each chunk once it is stored
+        self.on_written = on_written
+
+        self.written = 0
+        self.failed = 0
+        self.retries = 0
+        self.callback_errors = 0
+        self._buffer = []
+        self._futures = set()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(concurrency * 2)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bulk-writer")
+        self._started = time.monotonic()
+        self._last_report = self._started
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, rows):
+        self._buffer.extend(rows)
+        while len(self._buffer) >= self.chunk_size:
+            size = self.chunk_size
+            chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+            self._submit(chunk)
+
+    def flush(self):
+        if self._buffer:
+            chunk, self._buffer = self._buffer, []
+            self._submit(chunk)
+        for future in list(self._futures):
+            future.result()
+
+    def close(self):
+        self.flush()
+        self._executor.shutdown(wait=True)
+        stats = self.stats()
+        print(f"{self.label}: wrote {stats['written']} in {stats['elapsed_s']:.1f}s "
+              f"({stats['rows_per_s']:.0f}/s), {stats['retries']} retries, {stats['failed']} dead-lettered")
+        if stats["callback_errors"]:
+            print(f"{stats['callback_errors']} written chunks failed their on_written callback")
+        if stats["failed"]:
+            print(f"Failed rows saved to {self.dead_letter_path}")
+        return stats
+
+    def stats(self):
+        elapsed = time.monotonic() - self._started
+        with self._lock:
+            return {
+                "written": self.written,
+                "failed": self.failed,
+                "retries": self.retries,
+                "callback_errors": self.callback_errors,
+                "chunk_size": self.chunk_size,
+                "elapsed_s": elapsed,
+                "rows_per_s": self.written / elapsed if elapsed else 0.0,
+            }
+
+    def _submit(self, chunk):
+        self._slots.acquire()
+        future = self._executor.submit(self._write_chunk, chunk)
+        self._futures.add(future)
+        future.add_done_callback(self._done)
+
+    def _done(self, future):
+        self._futures.discard(future)
+        self._slots.release()
+
+    def _write_chunk(self, rows):
+        attempt = 0
+        while True:
+            start = time.monotonic()
+            try:
+                self.client.table(self.table).upsert(rows).execute()
+            except Exception as e:
+                attempt += 1
+                self._resize(0.5)
+                if attempt > self.max_retries:
+                    self._dead_letter(rows, e)
+                    return
+                with self._lock:
+                    self.retries += 1
+                delay = min(self.max_backoff, self.base_backoff * 2 ** (attempt - 1))
+                time.sleep(delay * random.uniform(0.5, 1.5))
+                continue
+            self._record_success(len(rows), time.monotonic() - start)
+            # The rows are stored either way, so a failing callback is reported but never retried
+            if self.on_written:
+                try:
+                    self.on_written(rows)
+                except Exception as e:
+                    with self._lock:
+                        self.callback_errors += 1
+                    print(f"on_written failed for {len(rows)} {self.label} (they were written): {e}")
+            return
+
+    def _resize(self, factor):
+        with self._lock:
+            size = int(self.chunk_size * factor)
+            self.chunk_size = max(self.min_chunk_size, min(self.max_chunk_size, size))
+
+    def _record_success(self, count, latency):
+        self._resize(1.5 if latency < self.target_latency / 2 else 0.75 if latency > self.target_latency else 1.0)
+        with self._lock:
+            self.written += count
+            now = time.monotonic()
+            if now - self._last_report >= self.report_every:
+                self._last_report = now
+                rate = self.written / (now - self._started)
+                print(f"{self.label}: {self.written} written ({rate:.0f}/s, chunk size {self.chunk_size})")
+
+    def _dead_letter(self, rows, error):
+        print(f"Giving up on {len(rows)} {self.label} after {self.max_retries} retries: {error}")
+        with self._lock:
+            self.failed += len(rows)
+            with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps({"table": self.table, "row": row, "error": str(error)}) + "\n")
+
+
+class FingerprintStore:
+    """
+    Local SQLite map of key -> fingerprint, split by namespace, used by the batch
+    scripts to remember what inputs a row had when it was last processed.
+    Thread-safe, so BulkWriter callbacks can record rows as they land.
+    """
+
+    def __init__(self, path="pipeline_state.db", namespace="default"):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+
+    def get_many(self, keys):
+        keys = list(keys)
+        found = {}
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                part = keys[i:i + 500]
+                placeholders = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT key, fingerprint FROM fingerprints WHERE namespace = ? AND key IN ({placeholders})",
+                    [self.namespace] + part
+                ).fetchall()
+                found.update(rows)
+        return found
+
+    def put_many(self, items):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO fingerprints (namespace, key, fingerprint) VALUES (?, ?, ?)",
+                    [(self.namespace, k, v) for k, v in items.items()]
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def items(self):
+        """All (key, fingerprint) pairs in this namespace."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT key, fingerprint FROM fingerprints WHERE namespace = ?", (self.namespace,)
+            ).fetchall()
+
+    def delete_many(self, keys):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "DELETE FROM fingerprints WHERE namespace = ? AND key = ?",
+                    [(self.namespace, k) for k in keys]
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,253 @@
+import csv
+import glob
+import gzip
+import io
+import json
+import os
+import time
+import zlib
+from abc import ABC, abstractmethod
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet output is optional
+    pa = pq = None
+
+CSV_HEADER = [
+    "job_id", "title", "company", "role", "industry", "department",
+    "employment_type", "role_category", "education_UG", "education_PG",
+    "key_skills", "date_posted", "scraped_date", "url"
+]
+
+
+def job_to_record(job_data):
+    """Flattens scrape_job_page output into one typed record (key_skills stays a list)."""
+    return {
+        "job_id": job_data["job_id"],
+        "title": job_data["title"],
+        "company": job_data["company"],
+        "role": job_data["role"],
+        "industry": job_data["industry"],
+        "department": job_data["department"],
+        "employment_type": job_data["employment_type"],
+        "role_category": job_data["role_category"],
+        "education_UG": job_data["education"].get("UG", ""),
+        "education_PG": job_data["education"].get("PG", ""),
+        "key_skills": list(job_data["key_skills"]),
+        "date_posted": job_data["date_posted"],
+        "scraped_date": job_data["scraped_date"],
+        "url": job_data["url"]
+    }
+
+
+def sink_format(path):
+    if path.endswith(".jsonl.gz"):
+        return "jsonl.gz"
+    if path.endswith(".parquet"):
+        return "parquet"
+    return "csv"
+
+
+class JobSink(ABC):
+    """
+    Buffers scraped jobs and writes them in batches: after `flush_every` records or
+    once `flush_interval` seconds have passed, whichever comes first. Each flush is
+    one write followed by fsync, so a crash loses at most the unflushed buffer.
+    `on_flush` is called with the records once they are durable.
+
+    The interval is checked in `add` and in `flush_if_due`, so it is a lower bound:
+    while no jobs arrive, the buffer is written only when the owner calls
+    `flush_if_due` (JobRecorder does every half interval). `close` and leaving
+    the `with` block flush whatever is left.
+    """
+
+    def __init__(self, path, flush_every=50, flush_interval=10.0, on_flush=None):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.on_flush = on_flush
+        self.written = 0
+        self._buffer = []
+        self._last_flush = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, job_data):
+        self._buffer.append(job_to_record(job_data))
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+        else:
+            self.flush_if_due()
+
+    def flush_if_due(self):
+        """Flushes a non-empty buffer once flush_interval has passed since the last flush."""
+        if self._buffer and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        records, self._buffer = self._buffer, []
+        self._write(records)
+        self.written += len(records)
+        if self.on_flush:
+            self.on_flush(records)
+
+    def close(self):
+        self.flush()
+
+    @abstractmethod
+    def _write(self, records):
+        """Durably appends one batch of records."""
+
+    @staticmethod
+    def _append_durably(path, data: bytes):
+        with open(path, "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class CsvSink(JobSink):
+    """Same file layout as before (key_skills comma-joined), so existing readers keep working."""
+
+    def __init__(self, path, **kwargs):
+        super().__init__(path, **kwargs)
+        self._repair_tail()
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            self._append_durably(path, (",".join(CSV_HEADER) + "\r\n").encode("utf-8"))
+
+    def _repair_tail(self):
+        """Drops a partial last row left by a crash mid-write."""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) == b"\n":
+                return
+            f.seek(0)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        print(f"Dropping {len(data) - end} bytes of a partially written row from {self.path}")
+        with open(self.path, "r+b") as f:
+            f.truncate(end)
+
+    def _write(self, records):
+        out = io.StringIO()
+        writer = csv.writer(out)
+        for record in records:
+            writer.writerow([
+                ", ".join(record[name]) if name == "key_skills" else record[name]
+                for name in CSV_HEADER
+            ])
+        self._append_durably(self.path, out.getvalue().encode("utf-8"))
+
+
+class JsonlGzSink(JobSink):
+    """
+    Gzip-compressed JSON lines. Every flush appends one complete gzip member; a
+    member cut short by a crash is cut off when the file is next opened for writing.
+    """
+
+    def __init__(self, path, **kwargs):
+        super().__init__(path, **kwargs)
+        self._repair_tail()
+
+    def _repair_tail(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            data = f.read()
+        good = 0
+        while good < len(data):
+            member = zlib.decompressobj(wbits=31)
+            try:
+                member.decompress(data[good:])
+            except zlib.error:
+                break
+            if not member.eof:
+                break
+            good = len(data) - len(member.unused_data)
+        if good < len(data):
+            print(f"Dropping {len(data) - good} bytes of a partially written block from {self.path}")
+            with open(self.path, "r+b") as f:
+                f.truncate(good)
+
+    def _write(self, records):
+        lines = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        self._append_durably(self.path, gzip.compress(lines.encode("utf-8")))
+
+
+class ParquetSink(JobSink):
+    """
+    A directory of Parquet files, one per flush (Parquet files can't be appended
+    to). Each part is written to a temp name and renamed, so readers never see a
+    half-written file.
+    """
+
+    def __init__(self, path, **kwargs):
+        if pa is None:
+            raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow)")
+        super().__init__(path, **kwargs)
+        os.makedirs(path, exist_ok=True)
+        parts = _parquet_parts(path)
+        self._next_part = int(os.path.basename(parts[-1])[5:11]) + 1 if parts else 0
+        self.schema = pa.schema(
+            [(name, pa.list_(pa.string()) if name == "key_skills" else pa.string()) for name in CSV_HEADER]
+        )
+
+    def _write(self, records):
+        table = pa.Table.from_pylist(records, schema=self.schema)
+        path = os.path.join(self.path, f"part-{self._next_part:06d}.parquet")
+        tmp_path = path + ".tmp"
+        pq.write_table(table, tmp_path)
+        with open(tmp_path, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        self._next_part += 1
+
+
+SINKS = {"csv": CsvSink, "jsonl.gz": JsonlGzSink, "parquet": ParquetSink}
+
+
+def open_sink(path, **kwargs) -> JobSink:
+    """Picks the sink from the file name: *.csv, *.jsonl.gz or *.parquet (a directory)."""
+    return SINKS[sink_format(path)](path, **kwargs)
+
+
+def _parquet_parts(path):
+    return sorted(glob.glob(os.path.join(path, "part-*.parquet")))
+
+
+def read_jobs(path):
+    """
+    Yields records written by any sink, in write order, with key_skills as a
+    list. Plain scraper CSVs are read the same way. A partially written last
+    line or block is skipped, so files can be read while a scrape appends to them.
+    """
+    fmt = sink_format(path)
+    if fmt == "csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            # Like the JSONL reader, skip a last row the scraper is still appending to
+            for row in csv.DictReader(line for line in f if line.endswith("\n")):
+                row["key_skills"] = [s.strip() for s in (row.get("key_skills") or "").split(",") if s.strip()]
+                yield row
+    elif fmt == "jsonl.gz":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            try:
+                for line in f:
+                    if line.endswith("\n"):
+                        yield json.loads(line)
+            except (EOFError, gzip.BadGzipFile):
+                print(f"Ignoring a truncated block at the end of {path}")
+    else:
+        if pq is None:
+            raise RuntimeError("Reading Parquet output needs pyarrow (pip install pyarrow)")
+        for part in _parquet_parts(path):
+            yield from pq.read_table(part).to_pylist()
@@ -1,11 +1,33 @@
 import asyncio
-from playwright.async_api import async_playwright
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+import argparse
 import hashlib
-import csv
 import os
+import threading
+import functools
+import glob
+import tempfile
 from datetime import datetime
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+from urllib.parse import urljoin, urlsplit
+
+from scrape_state import ScrapeState
+from job_sink import open_sink, read_jobs
 
 CSV_FILE = "naukri_jobs.csv"
+CHECKPOINT_FILE = "scrape_checkpoint.json"
+SEEN_FILE = "scraped_urls.txt"
+LISTING_URL = "https://www.naukri.com/{keyword}-jobs-{page}"
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/116.0.5845.97 Safari/537.36"
+VIEWPORT = {"width": 1280, "height": 800}
+
+# Nothing we extract depends on these; stylesheets stay because inner_text depends on layout
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+BLOCKED_HOSTS = (
+    "doubleclick.net", "googlesyndication.com", "googletagmanager.com", "google-analytics.com",
+    "googleadservices.com", "facebook.net", "connect.facebook.com", "clarity.ms", "hotjar.com"
+)
 
 async def scrape_job_page(page, job_url):
     await page.goto(job_url)
@@ -39,6 +61,10 @@ async def scrape_job_page(page, job_url):
     posted_el = await page.query_selector("div.styles_jhc__jd-stats__KrId0 span:has-text('Posted:') span")
     date_posted = await posted_el.inner_text() if posted_el else ""
 
+    return make_job(title, company, info_dict, edu_dict, key_skills, date_posted, job_url)
+
+
+def make_job(title, company, info_dict, edu_dict, key_skills, date_posted, job_url):
     scraped_date = datetime.today().strftime("%Y-%m-%d")
     job_id = hashlib.sha256((title + company + date_posted).encode()).hexdigest()
 
@@ -59,89 +85,398 @@ async def scrape_job_page(page, job_url):
     }
 
 
-async def scrape_naukri_jobs(pages=2, keyword="software-engineer"):
+# Same selectors as scrape_job_page, evaluated inside the page in one round trip
+EXTRACT_JOB_JS = """
+() => {
+    const text = (el) => el ? el.innerText : "";
+    const one = (selector) => text(document.querySelector(selector));
+
+    const info = {};
+    for (const item of document.querySelectorAll("div.styles_details__Y424J")) {
+        const label = item.querySelector("label");
+        const span = item.querySelector("span");
+        if (label && span) {
+            info[label.innerText.replace(/:/g, "").trim()] = span.innerText.trim();
+        }
+    }
+
+    let posted = "";
+    for (const stat of document.querySelectorAll("div.styles_jhc__jd-stats__KrId0 span")) {
+        const inner = stat.querySelector("span");
+        if (inner && stat.innerText.toLowerCase().includes("posted:")) {
+            posted = inner.innerText;
+            break;
+        }
+    }
+
+    return {
+        title: one("h1.styles_jd-header-title__rZwM1, div.styles_jd-header-title__rZwM1"),
+        company: one("div.styles_jd-header-comp-name__MvqAI > a"),
+        info: info,
+        ug: one("div.styles_education__KXFkO div.styles_details__Y424J:nth-child(2) > span"),
+        pg: one("div.styles_education__KXFkO div.styles_details__Y424J:nth-child(3) > span"),
+        skills: Array.from(document.querySelectorAll("div.styles_key-skill__GIPn_ a span"), (el) => el.innerText),
+        posted: posted,
+    };
+}
+"""
+
+
+async def scrape_job_page_evaluate(page, job_url):
+    """Same result as scrape_job_page, but all fields come back from a single page.evaluate."""
+    await page.goto(job_url)
+    await page.wait_for_selector("section.styles_job-desc-container__txpYf", timeout=60000)
+    fields = await page.evaluate(EXTRACT_JOB_JS)
+    return make_job(fields["title"], fields["company"], fields["info"],
+                    {"UG": fields["ug"], "PG": fields["pg"]}, fields["skills"], fields["posted"], job_url)
+
+
+EXTRACTORS = {"dom": scrape_job_page, "evaluate": scrape_job_page_evaluate}
+
+
+async def block_heavy_resources(target):
+    """Aborts image/font/media and ad/analytics requests for a page or browser context."""
+    async def handle(route):
+        request = route.request
+        host = urlsplit(request.url).hostname or ""
+        if request.resource_type in BLOCKED_RESOURCE_TYPES or host.endswith(BLOCKED_HOSTS):
+            await route.abort()
+        else:
+            await route.continue_()
+    await target.route("**/*", handle)
+
+
+def open_state(keyword, output=CSV_FILE, checkpoint_path=CHECKPOINT_FILE, seen_path=SEEN_FILE, restart=False):
+    state = ScrapeState(checkpoint_path, seen_path, keyword=keyword, restart=restart)
+    if not restart and os.path.exists(output):
+        state.seed(read_jobs(output))
+    return state
+
+
+class JobRecorder:
+    """
+    Sends scraped jobs to the output sink and keeps the scrape state in step with
+    it: a job's URL is only marked seen (and its listing page only counts as done)
+    once the sink has flushed it, so a crash never leaves a job marked as scraped
+    that isn't in the output.
+
+    Create it inside the running event loop: a background task flushes the sink's
+    buffer on its flush_interval even while a slow or stalled page holds up new jobs.
+    """
+
+    def __init__(self, state, output=CSV_FILE, **sink_options):
+        self.state = state
+        self.sink = open_sink(output, on_flush=self._flushed, **sink_options)
+        self.jobs = []
+        self._inflight = {}  # job_id -> [(page_num, job_link)] waiting for a flush
+        self._autoflush = asyncio.create_task(self._flush_periodically())
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(max(0.1, self.sink.flush_interval / 2))
+            try:
+                self.sink.flush_if_due()
+            except Exception as e:
+                print("Error flushing scraped jobs:", e)
+
+    def record(self, page_num, job_link, job_data):
+        """Returns True if the job is new and was queued for writing."""
+        job_id = job_data["job_id"]
+        if job_id in self.state.seen:  # same posting reached through another URL
+            self.state.mark_seen(job_link, job_id)
+            self.state.job_finished(page_num)
+            return False
+        if job_id in self._inflight:
+            self._inflight[job_id].append((page_num, job_link))
+            return False
+        self._inflight[job_id] = [(page_num, job_link)]
+        self.jobs.append(job_data)
+        self.sink.add(job_data)
+        return True
+
+    def failed(self, page_num):
+        self.state.job_finished(page_num, ok=False)
+
+    def _flushed(self, records):
+        for record in records:
+            for page_num, job_link in self._inflight.pop(record["job_id"]):
+                self.state.mark_seen(job_link, record["job_id"])
+                self.state.job_finished(page_num)
+
+    def close(self):
+        self._autoflush.cancel()
+        self.sink.close()
+        self.state.close()
+
+
+async def scrape_naukri_jobs(pages=2, keyword="software-engineer", start_page=209, state=None,
+                             output=CSV_FILE, extract="dom", block_resources=False, **sink_options):
+    state = state or open_state(keyword, output)
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=False)
-        page = await browser.new_page(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/116.0.5845.97 Safari/537.36",
-            viewport={"width": 1280, "height": 800}
-        )
-
-        # --- Prepare CSV file ---
-        header = [
-            "job_id", "title", "company", "role", "industry", "department", 
-            "employment_type", "role_category", "education_UG", "education_PG", 
-            "key_skills", "date_posted", "scraped_date", "url"
-        ]
-        
-        file_exists = os.path.exists(CSV_FILE)
-        with open(CSV_FILE, "a", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            if not file_exists:
-                writer.writerow(header)
-
-        all_jobs = []
+        page = await browser.new_page(user_agent=USER_AGENT, viewport=VIEWPORT)
+        if block_resources:
+            await block_heavy_resources(page)
+        extract_job = EXTRACTORS[extract]
+
+        # --- Prepare output ---
+        recorder = JobRecorder(state, output, **sink_options)
 
         # --- Loop through pages ---
-        for page_num in range(209, 209+pages + 1):
-            url = f"https://www.naukri.com/{keyword}-jobs-{page_num}"
-            print("Opening:", url)
-            await page.goto(url)
+        # A failing page still flushes what was scraped so far
+        try:
+            for page_num in state.pending_pages(start_page, pages):
+                url = LISTING_URL.format(keyword=keyword, page=page_num)
+                print("Opening:", url)
+                await page.goto(url)
 
-            try:
-                await page.wait_for_selector("div.cust-job-tuple", state="attached", timeout=60000)
-                print(f"Page {page_num} jobs loaded successfully!")
-            except:
-                print(f"Timeout: No jobs found on page {page_num}")
-                continue
-
-            job_cards = await page.query_selector_all("div.cust-job-tuple")
-            job_links = []
-            for job in job_cards:
-                job_link_el = await job.query_selector("a.title")
-                if job_link_el:
-                    link = await job_link_el.get_attribute("href")
-                    if link:
-                        job_links.append(link)
-
-            # --- Process each job ---
-            for job_link in job_links:
                 try:
-                    job_data = await scrape_job_page(page, job_link)
-                    all_jobs.append(job_data)
-
-                    # Append to CSV immediately
-                    with open(CSV_FILE, "a", newline="", encoding="utf-8") as f:
-                        writer = csv.writer(f)
-                        writer.writerow([
-                            job_data["job_id"],
-                            job_data["title"],
-                            job_data["company"],
-                            job_data["role"],
-                            job_data["industry"],
-                            job_data["department"],
-                            job_data["employment_type"],
-                            job_data["role_category"],
-                            job_data["education"].get("UG", ""),
-                            job_data["education"].get("PG", ""),
-                            ", ".join(job_data["key_skills"]),
-                            job_data["date_posted"],
-                            job_data["scraped_date"],
-                            job_data["url"]
-                        ])
-
-                    print(job_data['title'], "|", job_data['company'], "| Posted:", job_data['date_posted'])
-                except Exception as e:
-                    print("Error scraping job page:", e)
-
-            # --- Delay between pages ---
-            await asyncio.sleep(2)
+                    await page.wait_for_selector("div.cust-job-tuple", state="attached", timeout=60000)
+                    print(f"Page {page_num} jobs loaded successfully!")
+                except:
+                    print(f"Timeout: No jobs found on page {page_num}")
+                    continue
+
+                job_cards = await page.query_selector_all("div.cust-job-tuple")
+                job_links = []
+                for job in job_cards:
+                    job_link_el = await job.query_selector("a.title")
+                    if job_link_el:
+                        link = await job_link_el.get_attribute("href")
+                        if link and not state.is_seen(link):
+                            job_links.append(link)
+                state.page_started(page_num, len(job_links))
+
+                # --- Process each job ---
+                for job_link in job_links:
+                    try:
+                        job_data = await extract_job(page, job_link)
+                        if recorder.record(page_num, job_link, job_data):
+                            print(job_data['title'], "|", job_data['company'], "| Posted:", job_data['date_posted'])
+                    except Exception as e:
+                        print("Error scraping job page:", e)
+                        recorder.failed(page_num)
+
+                # --- Delay between pages ---
+                await asyncio.sleep(2)
+        finally:
+            recorder.close()
 
         await browser.close()
-        print(f"Total jobs scraped this session: {len(all_jobs)}")
-        print(f"Progress saved incrementally to {CSV_FILE}")
-        return all_jobs
+        print(f"Total jobs scraped this session: {len(recorder.jobs)}")
+        print(f"Progress saved incrementally to {output}")
+        return recorder.jobs
+
+
+# --- WORKER-POOL MODE ---
+
+class PolitenessLimiter:
+    """Spaces page loads across all workers: at most `rate` navigations per second in total."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            now = loop.time()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def collect_job_links(page, listing_url):
+    await page.goto(listing_url)
+    try:
+        await page.wait_for_selector("div.cust-job-tuple", state="attached", timeout=60000)
+    except PlaywrightTimeoutError:
+        print(f"Timeout: No jobs found on {listing_url}")
+        return []
+
+    job_links = []
+    for job in await page.query_selector_all("div.cust-job-tuple"):
+        job_link_el = await job.query_selector("a.title")
+        if job_link_el:
+            link = await job_link_el.get_attribute("href")
+            if link:
+                job_links.append(urljoin(listing_url, link))
+    return job_links
+
+
+async def scrape_with_retry(page, job_url, limiter, retries, extract_job=scrape_job_page):
+    for attempt in range(retries + 1):
+        await limiter.wait()
+        try:
+            return await extract_job(page, job_url)
+        except PlaywrightTimeoutError:
+            if attempt == retries:
+                raise
+            print(f"Timeout on {job_url}, retrying ({attempt + 1}/{retries})")
+            await asyncio.sleep(2 ** attempt)
+
+
+async def scrape_naukri_jobs_pooled(start_page=1, pages=2, keyword="software-engineer", workers=4,
+                                    headless=True, rate=2.0, retries=2,
+                                    listing_url=LISTING_URL, output=CSV_FILE, state=None,
+                                    extract="evaluate", block_resources=True, **sink_options):
+    """
+    Same output as scrape_naukri_jobs, but job detail pages are fetched by
+    `workers` browser contexts pulling URLs from a shared queue. One listing
+    reader feeds the queue; `rate` caps page loads per second across everyone.
+    """
+    state = state or open_state(keyword, output)
+    limiter = PolitenessLimiter(rate)
+    queue = asyncio.Queue(maxsize=workers * 10)
+    recorder = JobRecorder(state, output, **sink_options)
+    extract_job = EXTRACTORS[extract]
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=headless)
+
+        async def open_page():
+            context = await browser.new_context(user_agent=USER_AGENT, viewport=VIEWPORT)
+            if block_resources:
+                await block_heavy_resources(context)
+            return context, await context.new_page()
+
+        async def worker():
+            context, page = await open_page()
+            try:
+                while True:
+                    item = await queue.get()
+                    try:
+                        if item is None:
+                            return
+                        page_num, job_link = item
+                        job_data = await scrape_with_retry(page, job_link, limiter, retries, extract_job)
+                        if recorder.record(page_num, job_link, job_data):
+                            print(job_data['title'], "|", job_data['company'], "| Posted:", job_data['date_posted'])
+                    except Exception as e:
+                        print("Error scraping job page:", job_link, e)
+                        recorder.failed(page_num)
+                    finally:
+                        queue.task_done()
+            finally:
+                await context.close()
+
+        async def read_listings():
+            context, page = await open_page()
+            try:
+                for page_num in state.pending_pages(start_page, pages):
+                    url = listing_url.format(keyword=keyword, page=page_num)
+                    print("Opening:", url)
+                    await limiter.wait()
+                    try:
+                        job_links = await collect_job_links(page, url)
+                    except Exception as e:
+                        print(f"Error opening listing page {page_num}:", e)
+                        continue
+                    # Dedupe within the page too; the same posting can appear twice in a listing
+                    job_links = [link for link in dict.fromkeys(job_links) if not state.is_seen(link)]
+                    state.page_started(page_num, len(job_links))
+                    for job_link in job_links:
+                        await queue.put((page_num, job_link))
+            finally:
+                await context.close()
+            for _ in range(workers):
+                await queue.put(None)
+
+        # Watch the workers alongside the reader: if one dies (e.g. its browser context
+        # fails to open), nobody would drain the bounded queue and the reader would block forever
+        tasks = [asyncio.create_task(read_listings())] + [asyncio.create_task(worker()) for _ in range(workers)]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if task.exception() is not None:
+                    raise task.exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            recorder.close()
+        await browser.close()
+
+    print(f"Total jobs scraped this session: {len(recorder.jobs)}")
+    print(f"Progress saved incrementally to {output}")
+    return recorder.jobs
+
+
+class QuietRequestHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_fixtures(port=0, quiet=False):
+    """Serves job_scraping/fixtures on localhost in a background thread; returns (server, base_url)."""
+    handler_class = QuietRequestHandler if quiet else SimpleHTTPRequestHandler
+    handler = functools.partial(handler_class, directory=FIXTURES_DIR)
+    server = HTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
 
 
 if __name__ == "__main__":
-    asyncio.run(scrape_naukri_jobs(pages=5111-209, keyword="software-engineer"))
+    parser = argparse.ArgumentParser(description="Scrape Naukri job listings into a CSV.")
+    parser.add_argument("--keyword", default="software-engineer")
+    parser.add_argument("--start-page", type=int, default=209)
+    parser.add_argument("--pages", type=int, default=5111 - 209 + 1,
+                        help="number of listing pages from --start-page on (default: pages 209-5111)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="browser pages fetching job details in parallel (0 = original sequential scraper)")
+    parser.add_argument("--rate", type=float, default=2.0, help="max page loads per second across all workers")
+    parser.add_argument("--retries", type=int, default=2, help="retries per job page after a timeout")
+    parser.add_argument("--extract", choices=sorted(EXTRACTORS),
+                        help="'evaluate' reads a job page in one in-page call; 'dom' queries field by field "
+                             "(default: evaluate with --workers, dom without)")
+    parser.add_argument("--load-resources", action="store_true",
+                        help="don't block images, fonts, media and ad/analytics requests in worker-pool mode")
+    parser.add_argument("--headed", action="store_true", help="show the browser window in worker-pool mode")
+    parser.add_argument("--fixtures", action="store_true",
+                        help="scrape the local fixture pages instead of naukri.com (for testing)")
+    parser.add_argument("--output", default=CSV_FILE,
+                        help="*.csv, *.jsonl.gz, or *.parquet (a directory of parts; needs pyarrow)")
+    parser.add_argument("--flush-every", type=int, default=50, help="write buffered jobs after this many")
+    parser.add_argument("--flush-interval", type=float, default=10.0, help="... or after this many seconds")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE, help="completed listing pages, per keyword")
+    parser.add_argument("--seen", default=SEEN_FILE, help="hashes of job URLs/ids already scraped")
+    parser.add_argument("--restart", action="store_true",
+                        help="ignore the checkpoint and seen index and scrape the whole range again")
+    args = parser.parse_args()
+
+    if args.fixtures:
+        if args.workers <= 0:
+            parser.error("--fixtures needs --workers (the sequential scraper only reads naukri.com)")
+        # Never touch the real output, checkpoint or seen index, and scrape exactly the fixture listings
+        fixture_dir = tempfile.mkdtemp(prefix="scrape-fixtures-")
+        for name, default in (("output", CSV_FILE), ("checkpoint", CHECKPOINT_FILE), ("seen", SEEN_FILE)):
+            if getattr(args, name) == default:
+                setattr(args, name, os.path.join(fixture_dir, os.path.basename(default)))
+        args.start_page = 1
+        args.pages = len(glob.glob(os.path.join(FIXTURES_DIR, "listing-*.html")))
+        print(f"Fixture run: writing to {fixture_dir}")
+
+    state = open_state(args.keyword, args.output, args.checkpoint, args.seen, args.restart)
+    sink_options = {"flush_every": args.flush_every, "flush_interval": args.flush_interval}
+    pending = state.pending_pages(args.start_page, args.pages)
+    print(f"{len(pending)} of {args.pages} listing pages left, {len(state.seen)} jobs already seen")
+
+    if args.workers <= 0:
+        asyncio.run(scrape_naukri_jobs(pages=args.pages, keyword=args.keyword,
+                                       start_page=args.start_page, state=state, output=args.output,
+                                       extract=args.extract or "dom", **sink_options))
+    else:
+        listing_url = LISTING_URL
+        if args.fixtures:
+            server, base_url = serve_fixtures()
+            listing_url = base_url + "/listing-{page}.html"
+        asyncio.run(scrape_naukri_jobs_pooled(
+            start_page=args.start_page, pages=args.pages, keyword=args.keyword,
+            workers=args.workers, headless=not args.headed, rate=args.rate,
+            retries=args.retries, listing_url=listing_url, output=args.output, state=state,
+            extract=args.extract or "evaluate", block_resources=not args.load_resources, **sink_options
+        ))
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+from urllib.parse import urlsplit, urlunsplit
+
+
+def canonical_url(url):
+    """Drops the query string and fragment: Naukri appends per-search tracking params to job links."""
+    parts = urlsplit(url or "")
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path.rstrip("/"), "", ""))
+
+
+def url_key(url):
+    return hashlib.sha1(canonical_url(url).encode("utf-8")).hexdigest()
+
+
+class ScrapeState:
+    """
+    Durable scraper progress, loaded at startup so a restart skips finished work.
+
+    - The checkpoint (JSON, replaced atomically) records which listing pages are
+      complete for a keyword, as merged [first, last] ranges (workers finish pages
+      out of order). A page only counts as complete once all of its job links were
+      scraped or already seen, so pages with failures get revisited.
+    - The seen index is an append-only file of URL hashes and job_ids, one per
+      line. It is seeded from the url/job_id columns of the existing output, so
+      jobs scraped before checkpoints existed are not fetched again either.
+    """
+
+    def __init__(self, checkpoint_path="scrape_checkpoint.json", seen_path="scraped_urls.txt",
+                 keyword="software-engineer", restart=False):
+        self.checkpoint_path = checkpoint_path
+        self.seen_path = seen_path
+        self.keyword = keyword
+        self.done_ranges = []  # sorted, non-overlapping [first, last] page ranges
+        self.seen = set()
+        self._pending = {}  # page -> [jobs still in flight, any failures]
+
+        if not restart:
+            self._load_checkpoint()
+            self._load_seen()
+        elif os.path.exists(seen_path):
+            os.remove(seen_path)
+        self._seen_file = open(seen_path, "a", encoding="utf-8")
+
+    def _load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        progress = checkpoint.get("keywords", {}).get(self.keyword, {})
+        self.done_ranges = [list(r) for r in progress.get("done_ranges", [])]
+
+    def _load_seen(self):
+        if os.path.exists(self.seen_path):
+            with open(self.seen_path, encoding="utf-8") as f:
+                self.seen.update(line.strip() for line in f if line.strip())
+
+    def seed(self, records):
+        """Marks already-saved jobs as seen (their url and job_id fields)."""
+        before = len(self.seen)
+        for record in records:
+            if record.get("url"):
+                self.seen.add(url_key(record["url"]))
+            if record.get("job_id"):
+                self.seen.add(record["job_id"])
+        return len(self.seen) - before
+
+    def save(self):
+        checkpoint = {}
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, encoding="utf-8") as f:
+                checkpoint = json.load(f)
+        checkpoint.setdefault("keywords", {})[self.keyword] = {
+            "last_page": self.done_ranges[-1][1] if self.done_ranges else None,
+            "done_ranges": self.done_ranges,
+        }
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def close(self):
+        self._seen_file.close()
+
+    # --- Pages ---
+
+    def is_page_done(self, page_num):
+        return any(first <= page_num <= last for first, last in self.done_ranges)
+
+    def pending_pages(self, start_page, pages):
+        """The `pages` pages from start_page on (start_page included) not yet completed."""
+        return [n for n in range(start_page, start_page + pages) if not self.is_page_done(n)]
+
+    def page_started(self, page_num, job_count):
+        """Call once a listing page's links are known; job_count = links that will be scraped."""
+        if job_count:
+            self._pending[page_num] = [job_count, False]
+        else:
+            self._page_done(page_num)
+
+    def job_finished(self, page_num, ok=True):
+        pending = self._pending[page_num]
+        pending[0] -= 1
+        pending[1] = pending[1] or not ok
+        if pending[0] == 0:
+            del self._pending[page_num]
+            if not pending[1]:
+                self._page_done(page_num)
+
+    def _page_done(self, page_num):
+        merged = []
+        for first, last in sorted(self.done_ranges + [[page_num, page_num]]):
+            if merged and first <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], last)
+            else:
+                merged.append([first, last])
+        self.done_ranges = merged
+        self.save()
+
+    # --- Jobs ---
+
+    def is_seen(self, url):
+        return url_key(url) in self.seen
+
+    def mark_seen(self, url, job_id=None):
+        keys = [url_key(url)] + ([job_id] if job_id else [])
+        new_keys = [k for k in keys if k not in self.seen]
+        self.seen.update(new_keys)
+        if new_keys:
+            self._seen_file.write("".join(k + "\n" for k in new_keys))
+            self._seen_file.flush()
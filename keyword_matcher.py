@@ -0,0 +1,68 @@
+from collections import deque
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over a fixed set of keywords.
+
+    Built once from the keyword tables; `find_all` then reports every keyword that
+    occurs anywhere in a text (as a substring, overlaps included) in a single scan,
+    instead of rescanning the text once per keyword.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = list(dict.fromkeys(keywords))
+        self._goto = [{}]    # node -> {char: node}
+        self._fail = [0]
+        self._output = [()]  # node -> keywords ending here (including via fail links)
+
+        for keyword in self.keywords:
+            if not keyword:
+                continue
+            node = 0
+            for ch in keyword:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                node = nxt
+            self._output[node] = self._output[node] + (keyword,)
+
+        # Breadth-first pass to wire failure links and merge outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def _scan(self, text):
+        goto, fail, output = self._goto, self._fail, self._output
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if output[node]:
+                yield output[node]
+
+    def find_all(self, text) -> set:
+        """Returns the set of keywords occurring in text."""
+        hits = set()
+        for found in self._scan(text or ""):
+            hits.update(found)
+        return hits
+
+    def contains_any(self, text) -> bool:
+        """True as soon as any keyword is found (stops scanning early)."""
+        for _ in self._scan(text or ""):
+            return True
+        return False
@@ -0,0 +1,111 @@
+import os
+import csv
+import argparse
+from collections import Counter
+from dotenv import load_dotenv
+from supabase import create_client, Client
+
+from job_io import iter_job_batches, BulkWriter
+from skill_dictionary import SkillDictionary, canonical_skill, normalize_skill
+from skill_weights import SKILL_WEIGHTS, DEFAULT_SKILL_WEIGHT
+
+# 1. SETUP
+load_dotenv()
+url = os.getenv("SUPABASE_URL")
+key = os.getenv("SUPABASE_KEY") # Must be Service Role Key
+
+if not url or not key:
+    raise ValueError("Missing credentials")
+
+supabase: Client = create_client(url, key)
+
+# 2. STORAGE
+# Canonical skills are interned once and jobs keep their skills as an ID array:
+#
+#   create table skill_dictionary (
+#       skill_id int primary key,
+#       name text unique not null
+#   );
+#   alter table jobs add column skill_ids int[];
+#
+# skills_array stays the source of truth and aliases live in
+# skill_dictionary.SKILL_ALIASES. Every run recomputes the IDs from skills_array,
+# so run this after loading jobs and before `score_jobs.py --use-skill-ids`.
+
+NORMALIZE_COLUMNS = "job_id, skills_array, skill_ids"
+
+# 3. EXECUTION
+
+def save_new_skills(dictionary, known):
+    """Persists IDs assigned since `known`. Runs before any job row refers to them."""
+    rows = [{"skill_id": skill_id, "name": name} for skill_id, name in dictionary.items() if skill_id > known]
+    for i in range(0, len(rows), 500):
+        supabase.table('skill_dictionary').upsert(rows[i:i + 500]).execute()
+    return max([known] + [row['skill_id'] for row in rows])
+
+def write_report(path, unmapped, spellings, total_mentions):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["skill", "jobs", "share_of_mentions", "weight_used", "spellings"])
+        for name, jobs in unmapped.most_common():
+            writer.writerow([name, jobs, round(jobs / total_mentions, 5), DEFAULT_SKILL_WEIGHT,
+                             " | ".join(s for s, _ in spellings[name].most_common(5))])
+
+def run_normalization(batch_size=1000, report_path=None, top=25):
+    """
+    Maps every job's skills_array to canonical skill IDs and writes skill_ids
+    where they changed. Also counts, per canonical skill with no entry in
+    SKILL_WEIGHTS, how many jobs list it: those all score the flat default, so
+    the top of that list is where a new weight or alias buys the most accuracy.
+    """
+    dictionary = SkillDictionary.load(supabase)
+    known = max([0] + [skill_id for skill_id, _ in dictionary.items()])
+    print(f"Loaded {len(dictionary)} canonical skills.")
+
+    total = 0
+    mentions = weighted = 0
+    unmapped = Counter()
+    spellings = {}
+
+    with BulkWriter(supabase, 'jobs', label="skill ids") as writer:
+        for jobs in iter_job_batches(supabase, NORMALIZE_COLUMNS, batch_size=batch_size):
+            total += len(jobs)
+            updates = []
+            for job in jobs:
+                skill_ids = dictionary.intern_all(job.get('skills_array'))
+                if skill_ids != job.get('skill_ids'):
+                    updates.append({"job_id": job['job_id'], "skill_ids": skill_ids})
+
+                for skill_id in skill_ids:
+                    mentions += 1
+                    name = dictionary.name_of(skill_id)
+                    if name in SKILL_WEIGHTS:
+                        weighted += 1
+                    else:
+                        unmapped[name] += 1
+                for raw in job.get('skills_array') or []:
+                    name = canonical_skill(raw) if raw else ""
+                    if name and name not in SKILL_WEIGHTS:
+                        spellings.setdefault(name, Counter())[normalize_skill(raw)] += 1
+
+            known = save_new_skills(dictionary, known)
+            writer.add(updates)
+
+    print(f"Normalized {total} jobs: {writer.written} updated, {len(dictionary)} canonical skills.")
+    if mentions:
+        print(f"{weighted}/{mentions} skill mentions ({weighted / mentions:.1%}) have a weight; "
+              f"{len(unmapped)} skills fall back to the default {DEFAULT_SKILL_WEIGHT} points.")
+        print("Most common unweighted skills:")
+        for name, jobs in unmapped.most_common(top):
+            variants = ", ".join(s for s, _ in spellings[name].most_common(3) if s != name)
+            print(f"  {jobs:6}  {name}" + (f"  (also: {variants})" if variants else ""))
+    if report_path:
+        write_report(report_path, unmapped, spellings, mentions or 1)
+        print(f"Full report written to {report_path}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Map job skills to canonical skill IDs and report unweighted skills.")
+    parser.add_argument("--report", help="write every unweighted skill with its job count to this CSV")
+    parser.add_argument("--top", type=int, default=25, help="unweighted skills printed to the console")
+    args = parser.parse_args()
+    run_normalization(report_path=args.report, top=args.top)
@@ -0,0 +1,106 @@
+import os
+import json
+import argparse
+from itertools import islice
+
+from categorize_jobs import get_category
+from score_jobs import supabase, score_jobs_batch, job_fingerprint
+from job_io import BulkWriter, FingerprintStore
+from job_scraping.job_sink import read_jobs
+
+# --- 1. READING SCRAPER OUTPUT ---
+
+def iter_source_jobs(path, skip=0):
+    """
+    Yields job dicts from scraper output (CSV, JSONL.gz or a Parquet directory),
+    one row at a time, after skipping `skip` rows. Skills arrive as a list and
+    become skills_array; key_skills keeps the comma-joined form the table stores.
+    """
+    for job in islice(read_jobs(path), skip, None):
+        job["skills_array"] = job["key_skills"]
+        job["key_skills"] = ", ".join(job["key_skills"])
+        yield job
+
+def iter_batches(rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+# --- 2. CHECKPOINT ---
+# Scraper output is append-only in every format, so "rows already loaded" is enough to resume
+
+def load_checkpoint(path, source):
+    if not os.path.exists(path):
+        return 0
+    with open(path, encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("source") != os.path.abspath(source):
+        return 0
+    return checkpoint.get("rows_done", 0)
+
+def save_checkpoint(path, source, rows_done):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"source": os.path.abspath(source), "rows_done": rows_done}, f)
+    os.replace(tmp_path, path)
+
+# --- 3. ENRICH + LOAD ---
+
+def enrich(batch):
+    """Adds role_category and target_score in memory, deduplicating job_ids within the batch."""
+    by_id = {}
+    for job in batch:
+        by_id[job["job_id"]] = job  # later rows win, like a sequence of upserts would
+    jobs = list(by_id.values())
+    for job, score in zip(jobs, score_jobs_batch(jobs)):
+        job["role_category"] = get_category(job.get("title") or "")
+        job["target_score"] = score
+    return jobs
+
+def run_pipeline(source, batch_size=1000, checkpoint_path="pipeline_checkpoint.json",
+                 state_path="pipeline_state.db", restart=False):
+    """
+    One streaming pass: scraper output -> categorize -> score -> upsert into jobs.
+    Memory is bounded by batch_size; progress is checkpointed after every batch
+    has been written, so an interrupted run resumes where it stopped.
+    """
+    rows_done = 0 if restart else load_checkpoint(checkpoint_path, source)
+    if rows_done:
+        print(f"Resuming {source} after {rows_done} rows")
+
+    # Lets a later `score_jobs.py --incremental` skip everything loaded here
+    state = FingerprintStore(state_path, namespace="score")
+    fingerprints = {}
+
+    def record_written(rows):
+        state.put_many({row["job_id"]: fingerprints.pop(row["job_id"]) for row in rows})
+
+    with BulkWriter(supabase, "jobs", label="jobs", on_written=record_written) as writer:
+        for batch in iter_batches(iter_source_jobs(source, skip=rows_done), batch_size):
+            jobs = enrich(batch)
+            fingerprints.update({job["job_id"]: job_fingerprint(job) for job in jobs})
+            writer.add(jobs)
+            writer.flush()  # the checkpoint must only cover rows that reached the table
+            rows_done += len(batch)
+            save_checkpoint(checkpoint_path, source, rows_done)
+            print(f"Loaded {rows_done} rows")
+
+    state.close()
+    if writer.failed:
+        print(f"{writer.failed} rows could not be written; see {writer.dead_letter_path}")
+    return rows_done
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Categorize, score and load scraped jobs in one pass.")
+    parser.add_argument("source", nargs="?", default="naukri_jobs.csv", help="scraper output to load (.csv, .jsonl.gz or .parquet)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--checkpoint", default="pipeline_checkpoint.json")
+    parser.add_argument("--state", default="pipeline_state.db", help="fingerprint file shared with score_jobs --incremental")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and load from the first row")
+    args = parser.parse_args()
+    run_pipeline(args.source, args.batch_size, args.checkpoint, args.state, args.restart)
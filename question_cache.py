@@ -0,0 +1,89 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class QuestionCache:
+    """
+    In-process cache of question_bank rows, keyed by (skill, difficulty bucket).
+
+    Each bucket maps question_id -> question_data. Buckets expire after `ttl`
+    seconds and the least recently used bucket is evicted once `max_buckets`
+    is reached, so memory stays bounded no matter how many skills are tested.
+    """
+
+    def __init__(self, max_buckets=256, max_questions_per_bucket=500, ttl=300.0):
+        self.max_buckets = max_buckets
+        self.max_questions_per_bucket = max_questions_per_bucket
+        self.ttl = ttl
+        self._buckets = OrderedDict()  # (skill, bucket) -> (expires_at, {qid: question})
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, skill, bucket):
+        """Returns the cached questions for a bucket, or None on a miss/expiry."""
+        key = (skill, bucket)
+        with self._lock:
+            entry = self._buckets.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, questions = entry
+            if expires_at < time.monotonic():
+                del self._buckets[key]
+                self.misses += 1
+                return None
+            self._buckets.move_to_end(key)
+            self.hits += 1
+            return list(questions.values())
+
+    def set(self, skill, bucket, questions):
+        """Replaces a bucket with a freshly fetched list of questions."""
+        entries = OrderedDict()
+        for q in questions:
+            entries[str(q.get('question_id'))] = q
+        while len(entries) > self.max_questions_per_bucket:
+            entries.popitem(last=False)
+
+        key = (skill, bucket)
+        with self._lock:
+            self._buckets[key] = (time.monotonic() + self.ttl, entries)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+                self.evictions += 1
+
+    def add(self, skill, bucket, question):
+        """
+        Adds a newly inserted question to its bucket. Buckets that are not
+        cached are left alone; the next read will load them from the DB.
+        """
+        key = (skill, bucket)
+        with self._lock:
+            entry = self._buckets.get(key)
+            if entry is None:
+                return
+            _, questions = entry
+            questions[str(question.get('question_id'))] = question
+            while len(questions) > self.max_questions_per_bucket:
+                questions.popitem(last=False)
+
+    def invalidate(self, skill, bucket=None):
+        """Drops one bucket, or every bucket of a skill when bucket is None."""
+        with self._lock:
+            if bucket is not None:
+                self._buckets.pop((skill, bucket), None)
+                return
+            for key in [k for k in self._buckets if k[0] == skill]:
+                del self._buckets[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "buckets": len(self._buckets),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
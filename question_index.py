@@ -0,0 +1,233 @@
+import hashlib
+import json
+import os
+import random
+import re
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def normalize_title(text: str) -> str:
+    """Lowercases and collapses whitespace/punctuation so formatting changes don't matter."""
+    return " ".join(re.findall(r"[a-z0-9_]+", (text or "").lower()))
+
+
+def title_hash(text: str) -> str:
+    """Short digest of the whole normalized title, for exact-match checks."""
+    return hashlib.sha1(normalize_title(text).encode("utf-8")).hexdigest()[:16]
+
+
+def shingles(text: str, k: int = 5) -> set:
+    """Character k-grams of the normalized text (short titles fall back to the whole string)."""
+    norm = normalize_title(text)
+    if len(norm) <= k:
+        return {norm} if norm else set()
+    return {norm[i:i + k] for i in range(len(norm) - k + 1)}
+
+
+class MinHasher:
+    """MinHash signatures with fixed seeds, so signatures are stable across processes and restarts."""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, text: str) -> tuple:
+        hashes = [zlib.crc32(s.encode()) for s in shingles(text)]
+        if not hashes:
+            return tuple([_MAX_HASH] * self.num_perm)
+        return tuple(
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._perms
+        )
+
+
+def estimate_similarity(sig_a, sig_b) -> float:
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+class SkillIndex:
+    """
+    MinHash/LSH index over every question title of one skill, across all difficulty
+    buckets. Lookups only compare against titles sharing at least one LSH band, so a
+    near-duplicate check costs the same whether the skill has 10 or 10,000 questions.
+    """
+
+    def __init__(self, hasher: MinHasher, bands: int = 16):
+        if hasher.num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.hasher = hasher
+        self.bands = bands
+        self.rows = hasher.num_perm // bands
+        self._signatures = {}  # question_id -> (signature, title snippet, full title hash or None)
+        self._exact = {}       # full title hash -> question_id
+        self._buckets = {}     # (band, band hash) -> set of question_ids
+        self.unsaved = 0
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def __contains__(self, question_id):
+        return str(question_id) in self._signatures
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            start = band * self.rows
+            yield band, hash(signature[start:start + self.rows])
+
+    def add(self, question_id, title: str, signature=None, exact_key=None):
+        """
+        Indexes a question. With a stored signature, `title` may be just the saved
+        snippet, so the exact-match key comes from `exact_key` (None skips it).
+        """
+        qid = str(question_id)
+        known = self._signatures.get(qid)
+        if known is not None:
+            if known[2] is None and not signature:
+                # Loaded from an older file without exact keys; the full title fills it in
+                exact_key = title_hash(title)
+                self._signatures[qid] = (known[0], known[1], exact_key)
+                self._exact.setdefault(exact_key, qid)
+                self.unsaved += 1
+            return
+        if signature:
+            signature = tuple(signature)
+        else:
+            signature = self.hasher.signature(title)
+            exact_key = title_hash(title)
+        snippet = (title or "")[:100]
+        self._signatures[qid] = (signature, snippet, exact_key)
+        if exact_key:
+            self._exact.setdefault(exact_key, qid)
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, set()).add(qid)
+        self.unsaved += 1
+
+    def query(self, title: str, threshold: float = 0.5):
+        """Returns [(question_id, estimated similarity)] for LSH candidates above threshold, best first."""
+        signature = self.hasher.signature(title)
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates |= self._buckets.get(key, set())
+        scored = []
+        for qid in candidates:
+            similarity = estimate_similarity(signature, self._signatures[qid][0])
+            if similarity >= threshold:
+                scored.append((qid, similarity))
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored
+
+    def is_duplicate(self, title: str, threshold: float = 0.7) -> bool:
+        # Only whole titles match exactly; a shared long preamble is left to LSH
+        if title_hash(title) in self._exact:
+            return True
+        return bool(self.query(title, threshold))
+
+    def most_similar_titles(self, title: str, k: int = 3):
+        return [self._signatures[qid][1] for qid, _ in self.query(title, threshold=0.0)[:k]]
+
+    def to_dict(self):
+        # list() snapshots the dict atomically, so saving from a worker thread is safe
+        items = list(self._signatures.items())
+        return {
+            "num_perm": self.hasher.num_perm,
+            "bands": self.bands,
+            "questions": {qid: [list(sig), snippet, key] for qid, (sig, snippet, key) in items},
+        }
+
+
+class QuestionIndex:
+    """
+    Per-skill SkillIndexes, persisted as one JSON file per skill under `directory`.
+    At most `max_skills` stay in memory; the least recently used one is saved and
+    dropped when another is loaded.
+    """
+
+    def __init__(self, directory: str = None, num_perm: int = 64, bands: int = 16, max_skills: int = 256):
+        self.directory = directory
+        self.bands = bands
+        self.max_skills = max_skills
+        self.hasher = MinHasher(num_perm)
+        self._skills = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, skill):
+        # The hash keeps skills that sanitize alike ("C++", "C#") in separate files
+        safe = re.sub(r"[^a-z0-9_.-]+", "_", skill.lower())
+        digest = hashlib.sha1(skill.encode("utf-8")).hexdigest()[:8]
+        return os.path.join(self.directory, f"{safe}-{digest}.json")
+
+    def get(self, skill: str):
+        """Returns the loaded index for a skill, or None if it has not been built yet (or was evicted)."""
+        with self._lock:
+            index = self._skills.get(skill)
+            if index is not None:
+                self._skills.move_to_end(skill)
+            return index
+
+    def load(self, skill: str) -> SkillIndex:
+        """
+        Loads a skill's index from disk (or starts an empty one) and keeps it in memory.
+        An unreadable file also starts an empty index, for the caller to rebuild.
+        """
+        with self._lock:
+            if skill in self._skills:
+                self._skills.move_to_end(skill)
+                return self._skills[skill]
+            index = SkillIndex(self.hasher, self.bands)
+            if self.directory and os.path.exists(self._path(skill)):
+                try:
+                    self._read(self._path(skill), index)
+                except (OSError, ValueError, KeyError, TypeError) as e:
+                    print(f"WARNING: ignoring unreadable question index for {skill}: {e}")
+                    index = SkillIndex(self.hasher, self.bands)
+            self._skills[skill] = index
+            while len(self._skills) > self.max_skills:
+                evicted, evicted_index = self._skills.popitem(last=False)
+                if evicted_index.unsaved:
+                    self._write(evicted, evicted_index)
+            return index
+
+    def _read(self, path, index):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("num_perm") == self.hasher.num_perm and data.get("bands") == self.bands:
+            for qid, entry in data["questions"].items():
+                # Files saved before exact keys were stored have [signature, snippet] only
+                sig, snippet = entry[0], entry[1]
+                index.add(qid, snippet, signature=sig, exact_key=entry[2] if len(entry) > 2 else None)
+            index.unsaved = 0
+
+    def save(self, skill: str):
+        index = self._skills.get(skill)
+        if index is not None:
+            self._write(skill, index)
+
+    def _write(self, skill, index):
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        index.unsaved = 0
+        path = self._path(skill)
+        # A temp file per write, so concurrent saves of one skill never interleave in the same file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=os.path.basename(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(index.to_dict(), f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def save_all(self):
+        for skill in list(self._skills):
+            self.save(skill)
@@ -0,0 +1,189 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+
+
+def is_valid_question(q) -> bool:
+    """Minimal shape check for a generated question before it is pooled or served."""
+    if not isinstance(q, dict):
+        return False
+    if not isinstance(q.get('question_title'), str) or not q['question_title'].strip():
+        return False
+    options = q.get('options')
+    if not isinstance(options, dict) or len(options) < 2:
+        return False
+    return q.get('correct_answer') in options
+
+
+def title_key(q) -> str:
+    return q.get('question_title', '').replace(' ', '').lower()
+
+
+class RateLimiter:
+    """Token bucket: at most `rate_per_minute` acquisitions per minute, with small bursts."""
+
+    def __init__(self, rate_per_minute: float, burst: int = 1):
+        self.interval = 60.0 / rate_per_minute if rate_per_minute > 0 else 0.0
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) / self.interval)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) * self.interval)
+
+
+class QuestionPool:
+    """
+    Keeps a target depth of ready, validated questions for recently requested
+    (skill, difficulty bucket) pairs so Path B can serve from memory instead of
+    calling the LLM inside the request.
+
+    `producer(skill, bucket)` is an async callable returning a question dict
+    (already stored in the question bank) or None.
+    """
+
+    def __init__(self, producer, target_depth=5, concurrency=2, rate_per_minute=30,
+                 max_hot_buckets=64, hot_ttl=900.0, failure_backoff=30.0, poll_interval=5.0):
+        self.producer = producer
+        self.target_depth = target_depth
+        self.concurrency = concurrency
+        self.max_hot_buckets = max_hot_buckets
+        self.hot_ttl = hot_ttl
+        self.failure_backoff = failure_backoff
+        self.poll_interval = poll_interval
+
+        self._limiter = RateLimiter(rate_per_minute, burst=concurrency)
+        self._hot = OrderedDict()  # (skill, bucket) -> last requested (monotonic)
+        self._ready = {}           # (skill, bucket) -> deque of questions
+        self._inflight = {}        # (skill, bucket) -> pending producer calls
+        self._cooldown = {}        # (skill, bucket) -> retry-after (monotonic)
+        self._slots = None
+        self._wakeup = None
+        self._runner = None
+        self._tasks = set()
+
+    # --- REQUEST SIDE ---
+    def mark_hot(self, skill, bucket):
+        key = (skill, bucket)
+        self._hot[key] = time.monotonic()
+        self._hot.move_to_end(key)
+        while len(self._hot) > self.max_hot_buckets:
+            cold_key, _ = self._hot.popitem(last=False)
+            self._ready.pop(cold_key, None)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def take(self, skill, bucket, exclude_ids=()):
+        """Pops a ready question the user has not seen yet, or returns None."""
+        self.mark_hot(skill, bucket)
+        ready = self._ready.get((skill, bucket))
+        if not ready:
+            return None
+        for q in list(ready):
+            if str(q.get('question_id')) not in exclude_ids:
+                ready.remove(q)
+                return q
+        return None
+
+    def put(self, skill, bucket, question) -> bool:
+        """Adds a question to a hot bucket's ready queue unless invalid, duplicate or full."""
+        if (skill, bucket) not in self._hot or not is_valid_question(question):
+            return False
+        ready = self._ready.setdefault((skill, bucket), deque())
+        if len(ready) >= self.target_depth:
+            return False
+        key = title_key(question)
+        if any(title_key(q) == key for q in ready):
+            return False
+        ready.append(question)
+        return True
+
+    def depth(self, skill, bucket) -> int:
+        return len(self._ready.get((skill, bucket), ()))
+
+    def stats(self):
+        return {
+            "hot_buckets": len(self._hot),
+            "ready": sum(len(q) for q in self._ready.values()),
+            "inflight": sum(self._inflight.values()),
+        }
+
+    # --- PRODUCER SIDE ---
+    async def start(self):
+        if self._runner is not None:
+            return
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._wakeup = asyncio.Event()
+        self._runner = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._runner is None:
+            return
+        self._runner.cancel()
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(self._runner, *self._tasks, return_exceptions=True)
+        self._runner = None
+
+    def _expire_cold(self):
+        cutoff = time.monotonic() - self.hot_ttl
+        while self._hot:
+            key, last = next(iter(self._hot.items()))
+            if last >= cutoff:
+                break
+            del self._hot[key]
+            self._ready.pop(key, None)
+
+    def _wants_more(self, key) -> bool:
+        if key not in self._hot or self._cooldown.get(key, 0) > time.monotonic():
+            return False
+        return self.depth(*key) + self._inflight.get(key, 0) < self.target_depth
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            self._expire_cold()
+            # Most recently requested buckets are filled first
+            for key in list(reversed(self._hot)):
+                while self._wants_more(key):
+                    await self._slots.acquire()
+                    await self._limiter.acquire()
+                    if not self._wants_more(key):
+                        self._slots.release()
+                        break
+                    self._inflight[key] = self._inflight.get(key, 0) + 1
+                    task = asyncio.create_task(self._fill(key))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _fill(self, key):
+        skill, bucket = key
+        try:
+            question = await self.producer(skill, bucket)
+            if question is None or not self.put(skill, bucket, question):
+                self._cooldown[key] = time.monotonic() + self.failure_backoff
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"POOL ERROR ({skill} L{bucket}): {str(e)}")
+            self._cooldown[key] = time.monotonic() + self.failure_backoff
+        finally:
+            self._inflight[key] -= 1
+            if not self._inflight[key]:
+                del self._inflight[key]
+            self._slots.release()
@@ -1,7 +1,17 @@
 import os
+import csv
+import json
+import hashlib
+import argparse
+import requests
 from dotenv import load_dotenv
 from supabase import create_client, Client
 
+from keyword_matcher import KeywordMatcher
+from skill_weights import SKILL_WEIGHTS, DEFAULT_SKILL_WEIGHT
+from skill_dictionary import SKILL_ALIASES, SkillDictionary, canonical_skill
+from job_io import iter_job_batches, BulkWriter, FingerprintStore
+
 # 1. SETUP
 load_dotenv()
 url = os.getenv("SUPABASE_URL")
@@ -24,30 +34,6 @@ TIER_1_COMPANIES = [
     "hewlett packard", "hpe", "dell", "ibm", "accenture", "deloitte"
 ]
 
-# High Value Skills (High Demand / Lower Supply / High Complexity)
-SKILL_WEIGHTS = {
-    # AI/ML/Data - Worth 25 pts
-    "tensorflow": 25, "pytorch": 25, "machine learning": 25, "deep learning": 25,
-    "nlp": 25, "computer vision": 25, "llm": 28, "generative ai": 28,
-    "spark": 22, "hadoop": 20, "kafka": 22, "airflow": 20,
-    
-    # Cloud/DevOps - Worth 22 pts
-    "kubernetes": 25, "docker": 15, "aws": 18, "azure": 18, "gcp": 18,
-    "terraform": 22, "ansible": 18, "jenkins": 15, "ci/cd": 15,
-    
-    # Backend/Systems - Worth 18 pts
-    "rust": 25, "golang": 20, "go": 20, "c++": 20, "java": 15, "c#": 15,
-    "microservices": 20, "distributed systems": 25, "system design": 25,
-    "graphql": 18, "redis": 15, "postgres": 15, "postgresql": 15,
-    
-    # Frontend - Worth 12 pts
-    "react": 12, "angular": 12, "vue": 12, "typescript": 14, "next.js": 14,
-    "redux": 10, "javascript": 10, "html": 5, "css": 5,
-    
-    # General - Worth 8 pts
-    "python": 12, "agile": 5, "scrum": 5, "communication": 5, "git": 8
-}
-
 # Role Seniority Baseline
 ROLE_BASE_SCORES = {
     "intern": 150,
@@ -68,12 +54,33 @@ ROLE_BASE_SCORES = {
 
 # --- 3. THE SCORING ENGINE ---
 
+# Compiled once: each title/company is scanned a single time for every keyword
+ROLE_MATCHER = KeywordMatcher(ROLE_BASE_SCORES)
+TIER_1_MATCHER = KeywordMatcher(TIER_1_COMPANIES)
+
+def role_base_score(title):
+    # Expects a lowercased title
+    base_score = 450
+    role_hits = ROLE_MATCHER.find_all(title)
+    if role_hits:
+        # The most senior keyword wins (e.g. "Senior Principal" scores as Principal)
+        base_score = max(ROLE_BASE_SCORES[keyword] for keyword in role_hits)
+    elif "analyst" in title:
+        base_score = 400
+    return base_score
+
+def company_bonus(company):
+    # Expects a lowercased company name
+    return 150 if TIER_1_MATCHER.contains_any(company) else 0
+
+def education_bonus(pg_req):
+    if pg_req and 'any postgraduate' not in pg_req.lower() and 'not required' not in pg_req.lower():
+        return 43
+    return 0
+
 def calculate_granular_score(job):
     score = 0
     
-    # A. BASELINE
-    base_score = 450 
-    
     # --- SAFETY FIX: Handle None values safely ---
     # Use (value or "") to ensure it's always a string, even if DB has NULL
     title = (job.get('title') or "").lower()
@@ -81,85 +88,234 @@ def calculate_granular_score(job):
     # Use (value or []) to ensure it's always a list
     skills = job.get('skills_array') or []
     
-    # B. ROLE HIERARCHY ANALYSIS
-    role_matched = False
-    for keyword, value in ROLE_BASE_SCORES.items():
-        if keyword in title:
-            base_score = value
-            role_matched = True
-            # We don't break here, we let it find the "highest" match if multiple exist
-            # (e.g. "Senior Principal" might trigger both, we take the last one or rely on order)
-    
-    if not role_matched and "analyst" in title:
-        base_score = 400
-
-    score += base_score
+    # A/B. BASELINE + ROLE HIERARCHY ANALYSIS
+    score += role_base_score(title)
 
     # C. COMPANY PRESTIGE
-    for tech_giant in TIER_1_COMPANIES:
-        if tech_giant in company:
-            score += 150 
-            break
+    score += company_bonus(company)
 
     # D. SKILL STACK VALUATION
+    # Each canonical skill counts once ("React" and "ReactJS" on one job are the same skill)
     skill_points = 0
+    counted = set()
     for skill in skills:
         if not skill: continue # Skip empty/null entries inside array
-        
-        s_clean = skill.lower().strip()
-        if s_clean in SKILL_WEIGHTS:
-            skill_points += SKILL_WEIGHTS[s_clean]
-        else:
-            # Default points for unknown skills
-            skill_points += 8 
+        name = canonical_skill(skill)
+        if not name or name in counted: continue
+        counted.add(name)
+        skill_points += SKILL_WEIGHTS.get(name, DEFAULT_SKILL_WEIGHT)
     
     # Cap skill points so huge lists don't break the scale
     skill_points = min(300, skill_points)
     score += skill_points
 
     # E. EDUCATION BONUS
-    pg_req = job.get('education_PG') or ""
-    if pg_req and 'any postgraduate' not in pg_req.lower() and 'not required' not in pg_req.lower():
-         score += 43 
+    score += education_bonus(job.get('education_PG') or "")
 
     # F. CLAMPING (Ensure 0-1000)
     final_score = int(min(1000, max(0, score)))
     
     return final_score
 
+# --- 3b. BULK (COLUMNAR) SCORING ---
+# Job tables are highly repetitive (a few hundred distinct titles, companies and skills
+# across thousands of rows), so each distinct value is scored once and reused.
+
+def _memoized(fn):
+    cache = {}
+    def lookup(value):
+        result = cache.get(value)
+        if result is None:
+            result = cache[value] = fn(value)
+        return result
+    return lookup
+
+def to_columns(jobs):
+    """
+    Accepts a list of job dicts, a dict of columns (lists, NumPy arrays, ...) or a
+    pyarrow Table, and returns a dict of columns. Every key any job dict carries
+    (skill_ids included) becomes a column, NULL for the jobs without it.
+    """
+    if hasattr(jobs, "to_pydict"):
+        return jobs.to_pydict()
+    if isinstance(jobs, dict):
+        return jobs
+    columns = {"title": [], "company": [], "skills_array": [], "education_PG": []}
+    for i, job in enumerate(jobs):
+        for name in job:
+            if name not in columns:
+                columns[name] = [None] * i
+        for name, values in columns.items():
+            values.append(job.get(name))
+    return columns
+
+def load_jobs_csv(path):
+    """Reads a scraper CSV into columns, splitting key_skills into skills_array."""
+    columns = {"job_id": [], "title": [], "company": [], "skills_array": [], "education_PG": []}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            columns["job_id"].append(row.get("job_id"))
+            columns["title"].append(row.get("title"))
+            columns["company"].append(row.get("company"))
+            columns["skills_array"].append([s.strip() for s in (row.get("key_skills") or "").split(",") if s.strip()])
+            columns["education_PG"].append(row.get("education_PG"))
+    return columns
+
+def score_jobs_batch(jobs, dictionary: SkillDictionary = None):
+    """
+    Scores a whole batch at once. Gives exactly the same results as calling
+    calculate_granular_score on each row.
+
+    With a dictionary, rows that carry skill_ids (written by normalize_skills.py)
+    are scored from those integer IDs and their skills_array is not parsed at all.
+    """
+    columns = to_columns(jobs)
+    n = len(columns["title"])
+    # Missing columns count as NULL; `is None` rather than `or` so NumPy arrays work too
+    def column(name):
+        values = columns.get(name)
+        return [None] * n if values is None else values
+    titles, companies = column("title"), column("company")
+    skills_col, pg_col = column("skills_array"), column("education_PG")
+    ids_col = column("skill_ids") if dictionary is not None else [None] * n
+
+    role_for = _memoized(lambda t: role_base_score((t or "").lower()))
+    company_for = _memoized(lambda c: company_bonus((c or "").lower()))
+    canonical_for = _memoized(canonical_skill)
+    education_for = _memoized(lambda pg: education_bonus(pg or ""))
+    # skill_id -> weight, filled on first use (IDs are small and dense)
+    id_weights = [None] * (len(dictionary) + 1 if dictionary is not None else 0)
+
+    scores = []
+    for title, company, skills, pg_req, skill_ids in zip(titles, companies, skills_col, pg_col, ids_col):
+        skill_points = 0
+        if skill_ids is not None:
+            for skill_id in skill_ids:
+                if skill_id >= len(id_weights):
+                    id_weights.extend([None] * (skill_id + 1 - len(id_weights)))
+                weight = id_weights[skill_id]
+                if weight is None:
+                    weight = id_weights[skill_id] = SKILL_WEIGHTS.get(dictionary.name_of(skill_id), DEFAULT_SKILL_WEIGHT)
+                skill_points += weight
+        else:
+            names = {canonical_for(skill) for skill in (skills if skills is not None else ()) if skill}
+            names.discard("")
+            for name in names:
+                skill_points += SKILL_WEIGHTS.get(name, DEFAULT_SKILL_WEIGHT)
+        score = role_for(title) + company_for(company) + min(300, skill_points) + education_for(pg_req)
+        scores.append(int(min(1000, max(0, score))))
+    return scores
+
+# --- 3c. INCREMENTAL FINGERPRINTS ---
+# Bump when the scoring logic itself changes; the weight tables are hashed automatically
+SCORING_LOGIC_VERSION = 3  # 3: skills are canonicalized and counted once per job
+
+WEIGHTS_VERSION = hashlib.sha256(json.dumps(
+    [SCORING_LOGIC_VERSION, SKILL_WEIGHTS, SKILL_ALIASES, ROLE_BASE_SCORES, TIER_1_COMPANIES],
+    sort_keys=True
+).encode()).hexdigest()[:16]
+
+def job_fingerprint(job):
+    """Hash of everything a job's score depends on, including the weight tables."""
+    inputs = [WEIGHTS_VERSION, job.get('title'), job.get('company'),
+              job.get('skills_array'), job.get('education_PG')]
+    return hashlib.sha1(json.dumps(inputs, ensure_ascii=False).encode()).hexdigest()
+
 # --- 4. EXECUTION ---
 
-def run_evaluation():
-    print("Fetching jobs from Supabase...")
-    
-    # Fetch UP TO 10,000 jobs (Supabase defaults to 1000 if you don't set limit)
-    response = supabase.table('jobs').select('*').limit(10000).execute()
-    jobs = response.data
-    
-    print(f"Analyzing {len(jobs)} jobs...")
-    
-    updates = []
-    
-    for job in jobs:
-        precise_score = calculate_granular_score(job)
-        
-        updates.append({
-            "job_id": job['job_id'],
-            "target_score": precise_score
-        })
-        
-    print(f"Prepared scores for {len(updates)} jobs. Starting batch update...")
-
-    # Write to DB in chunks of 100 to avoid timeouts
-    chunk_size = 100
-    for i in range(0, len(updates), chunk_size):
-        chunk = updates[i:i + chunk_size]
-        try:
-            # Upsert updates existing rows based on Primary Key (job_id)
-            supabase.table('jobs').upsert(chunk).execute()
-            print(f"Updated records {i} to {i + len(chunk)}")
-        except Exception as e:
-            print(f"Error on chunk starting at {i}: {e}")
+def notify_job_index(job_ids=None):
+    """
+    Tells the API's /recommend_jobs index which scores changed (JOB_INDEX_REFRESH_URL,
+    e.g. http://127.0.0.1:8000/refresh_job_index, authorized with the API's ADMIN_TOKEN).
+    job_ids=None asks for a full re-sync.
+    """
+    refresh_url = os.getenv("JOB_INDEX_REFRESH_URL")
+    if not refresh_url:
+        return
+    headers = {"X-Admin-Token": os.getenv("ADMIN_TOKEN", "")}
+    bodies = [{}] if job_ids is None else [{"job_ids": job_ids[i:i + 5000]} for i in range(0, len(job_ids), 5000)]
+    try:
+        for body in bodies:
+            requests.post(refresh_url, json=body, headers=headers, timeout=120).raise_for_status()
+        print(f"Job index refreshed via {refresh_url}")
+    except requests.RequestException as e:
+        print(f"Could not refresh the job index ({e}); it will catch up on its periodic refresh.")
+
+# Only the columns calculate_granular_score reads, plus the current score to diff against
+SCORING_COLUMNS = "job_id, title, company, skills_array, education_PG, target_score"
+
+def run_evaluation(batch_size=1000, incremental=False, state_path="pipeline_state.db", use_skill_ids=False):
+    """
+    Scores every job. With incremental=True, jobs whose fingerprint matches the
+    last run are skipped, and only scores that actually changed are written.
+    With use_skill_ids=True, jobs normalized by normalize_skills.py are scored
+    from their skill_ids column.
+    """
+    print("Streaming jobs from Supabase...")
+    columns = SCORING_COLUMNS
+    dictionary = None
+    if use_skill_ids:
+        dictionary = SkillDictionary.load(supabase)
+        columns += ", skill_ids"
+        print(f"Loaded {len(dictionary)} canonical skills.")
+
+    state = FingerprintStore(state_path, namespace="score") if incremental else None
+    total = skipped = unchanged = 0
+    pending = {}  # job_id -> fingerprint, recorded once the write lands
+    written_ids = []
+
+    def record_written(rows):
+        written_ids.extend(row['job_id'] for row in rows)
+        if state:
+            state.put_many({row['job_id']: pending.pop(row['job_id']) for row in rows})
+
+    # Upsert updates existing rows based on Primary Key (job_id)
+    with BulkWriter(supabase, 'jobs', label="scores", on_written=record_written) as writer:
+        for jobs in iter_job_batches(supabase, columns, batch_size=batch_size):
+            total += len(jobs)
+            fingerprints = {}
+            if state:
+                fingerprints = {job['job_id']: job_fingerprint(job) for job in jobs}
+                previous = state.get_many(fingerprints)
+                fresh = len(jobs)
+                jobs = [
+                    job for job in jobs
+                    if job.get('target_score') is None or previous.get(job['job_id']) != fingerprints[job['job_id']]
+                ]
+                skipped += fresh - len(jobs)
+
+            updates = []
+            settled = {}
+            for job, precise_score in zip(jobs, score_jobs_batch(jobs, dictionary)):
+                if incremental and job.get('target_score') == precise_score:
+                    settled[job['job_id']] = fingerprints[job['job_id']]
+                    continue
+                updates.append({
+                    "job_id": job['job_id'],
+                    "target_score": precise_score
+                })
+
+            if state:
+                unchanged += len(settled)
+                state.put_many(settled)
+                pending.update({u['job_id']: fingerprints[u['job_id']] for u in updates})
+            writer.add(updates)
+
+    if state:
+        state.close()
+        print(f"Scanned {total} jobs: {skipped} skipped (inputs unchanged), "
+              f"{unchanged} rescored with the same score, {writer.written} updated.")
+    else:
+        print(f"Scored {total} jobs.")
+
+    notify_job_index(written_ids if incremental else None)
 
 if __name__ == "__main__":
-    run_evaluation()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Recompute target_score for every job.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="skip jobs whose inputs and weight tables are unchanged since the last run")
+    parser.add_argument("--state", default="pipeline_state.db", help="fingerprint file used by --incremental")
+    parser.add_argument("--use-skill-ids", action="store_true",
+                        help="score from the skill_ids column written by normalize_skills.py")
+    args = parser.parse_args()
+    run_evaluation(incremental=args.incremental, state_path=args.state, use_skill_ids=args.use_skill_ids)
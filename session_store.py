@@ -0,0 +1,187 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+
+class SessionStore(ABC):
+    """
+    Storage for in-flight test sessions, keyed by user_id.
+
+    Sessions are plain JSON-serializable dicts. Callers must `put` a session
+    back after changing it; backends are free to hand out copies.
+    """
+
+    @abstractmethod
+    def get(self, user_id: str):
+        """The user's session, or None if there is none or it expired."""
+
+    @abstractmethod
+    def put(self, user_id: str, session: dict):
+        """Stores the session and restarts its idle timer."""
+
+    @abstractmethod
+    def pop(self, user_id: str):
+        """Removes and returns the user's session (None if absent or expired)."""
+
+    @abstractmethod
+    def __len__(self):
+        """Number of live sessions."""
+
+    def stats(self) -> dict:
+        return {"sessions": len(self)}
+
+
+class MemorySessionStore(SessionStore):
+    """Single-process store with idle expiry and a hard cap on live sessions."""
+
+    def __init__(self, ttl=3600.0, max_sessions=10000):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()  # user_id -> (expires_at, session)
+        self._lock = threading.Lock()
+        self.expirations = 0
+        self.evictions = 0
+
+    def _purge_expired(self, now):
+        # Entries are kept in last-touched order, so expired ones sit at the front
+        while self._sessions:
+            user_id, (expires_at, _) = next(iter(self._sessions.items()))
+            if expires_at > now:
+                break
+            del self._sessions[user_id]
+            self.expirations += 1
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            self._purge_expired(now)
+            entry = self._sessions.get(user_id)
+            return entry[1] if entry else None
+
+    def put(self, user_id, session):
+        now = time.monotonic()
+        with self._lock:
+            self._purge_expired(now)
+            self._sessions[user_id] = (now + self.ttl, session)
+            self._sessions.move_to_end(user_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, user_id):
+        with self._lock:
+            entry = self._sessions.pop(user_id, None)
+            return entry[1] if entry else None
+
+    def __len__(self):
+        with self._lock:
+            self._purge_expired(time.monotonic())
+            return len(self._sessions)
+
+    def stats(self):
+        return {
+            "sessions": len(self),
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+        }
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    File-backed store shared by every worker process on the host. Sessions
+    survive restarts; idle ones expire after `ttl` and the least recently
+    touched are evicted beyond `max_sessions`.
+    """
+
+    def __init__(self, path, ttl=3600.0, max_sessions=100000):
+        self.path = path
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.expirations = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                user_id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_expires ON sessions (expires_at)")
+        self._writes = 0
+
+    def _purge(self, now):
+        cur = self._conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+        self.expirations += max(0, cur.rowcount)
+        cur = self._conn.execute("""
+            DELETE FROM sessions WHERE user_id IN (
+                SELECT user_id FROM sessions ORDER BY expires_at DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_sessions,))
+        self.evictions += max(0, cur.rowcount)
+
+    def get(self, user_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM sessions WHERE user_id = ? AND expires_at > ?",
+                (user_id, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, user_id, session):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (user_id, data, expires_at) VALUES (?, ?, ?)",
+                (user_id, json.dumps(session), now + self.ttl)
+            )
+            # Sweeping on every write would dominate; every 100th write keeps the table bounded
+            self._writes += 1
+            if self._writes % 100 == 0:
+                self._purge(now)
+
+    def pop(self, user_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, expires_at FROM sessions WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("DELETE FROM sessions WHERE user_id = ?", (user_id,))
+        return json.loads(row[0]) if row[1] > time.time() else None
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM sessions WHERE expires_at > ?", (time.time(),)
+            ).fetchone()[0]
+
+    def stats(self):
+        return {
+            "sessions": len(self),
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+        }
+
+
+def create_session_store(url: str = None, ttl: float = 3600.0, max_sessions: int = 10000) -> SessionStore:
+    """
+    Builds a store from a URL: "memory" (default) or "sqlite:///path/to/sessions.db".
+    """
+    url = url or "memory"
+    if url == "memory":
+        return MemorySessionStore(ttl=ttl, max_sessions=max_sessions)
+    if url.startswith("sqlite:///"):
+        path = url[len("sqlite:///"):]
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        return SQLiteSessionStore(path, ttl=ttl, max_sessions=max_sessions)
+    raise ValueError(f"Unsupported SESSION_STORE: {url}")
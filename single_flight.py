@@ -0,0 +1,103 @@
+import asyncio
+
+
+class _Flight:
+    def __init__(self, task):
+        self.task = task
+        self.items = []
+        self.waiters = 0
+        self.released = False
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent misses on the same key into one in-flight batch.
+
+    The first caller for a key starts `producer(key, count)`, an async callable
+    returning a list of items; callers arriving while it runs wait for the same
+    call instead of starting their own. When it finishes, its items are handed
+    out one per waiter, in arrival order. A waiter left empty-handed (the batch
+    was smaller than the crowd, or it had to skip every remaining item) starts
+    or joins the next flight, up to `max_rounds` times.
+
+    `count` is the number of callers waiting on the key when the flight starts,
+    clamped to [batch_size, max_batch_size]. Items no waiter claimed are passed
+    to `on_leftover(key, item)`.
+
+    Waiters are shielded from each other: one cancelled caller does not cancel
+    the shared call, and a flight whose waiters all left still delivers its
+    items to `on_leftover`.
+    """
+
+    def __init__(self, producer, batch_size=3, max_batch_size=8, max_rounds=3, on_leftover=None):
+        self.producer = producer
+        self.batch_size = batch_size
+        self.max_batch_size = max(batch_size, max_batch_size)
+        self.max_rounds = max_rounds
+        self.on_leftover = on_leftover
+        self._flights = {}  # key -> _Flight in progress
+        self._waiting = {}  # key -> callers inside take()
+        self._counts = {"flights": 0, "coalesced": 0, "items": 0, "leftover": 0}
+
+    async def take(self, key, accept=None):
+        """
+        One item for this caller, or None if `max_rounds` flights produced nothing
+        it could accept. Producer errors propagate to every waiter of that flight.
+        """
+        self._waiting[key] = self._waiting.get(key, 0) + 1
+        try:
+            for _ in range(self.max_rounds):
+                flight = self._flights.get(key)
+                if flight is None:
+                    flight = self._start(key)
+                else:
+                    self._counts["coalesced"] += 1
+                flight.waiters += 1
+                try:
+                    await asyncio.shield(flight.task)
+                    for i, item in enumerate(flight.items):
+                        if accept is None or accept(item):
+                            del flight.items[i]
+                            return item
+                finally:
+                    flight.waiters -= 1
+                    if flight.waiters == 0 and flight.task.done():
+                        self._release(key, flight)
+            return None
+        finally:
+            self._waiting[key] -= 1
+            if not self._waiting[key]:
+                del self._waiting[key]
+
+    def in_flight(self, key) -> bool:
+        return key in self._flights
+
+    def stats(self):
+        return dict(self._counts, in_flight=len(self._flights))
+
+    def _start(self, key):
+        count = min(self.max_batch_size, max(self.batch_size, self._waiting.get(key, 1)))
+        flight = _Flight(asyncio.ensure_future(self.producer(key, count)))
+        self._flights[key] = flight
+        self._counts["flights"] += 1
+        flight.task.add_done_callback(lambda task: self._landed(key, flight))
+        return flight
+
+    def _landed(self, key, flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.task.cancelled() and flight.task.exception() is None:
+            flight.items = list(flight.task.result() or ())
+            self._counts["items"] += len(flight.items)
+        if flight.waiters == 0:
+            self._release(key, flight)
+
+    def _release(self, key, flight):
+        if flight.released:
+            return
+        flight.released = True
+        leftovers, flight.items = flight.items, []
+        self._counts["leftover"] += len(leftovers)
+        if self.on_leftover:
+            for item in leftovers:
+                self.on_leftover(key, item)
@@ -0,0 +1,112 @@
+import re
+import threading
+
+from job_io import iter_job_batches
+
+# Spellings seen in scraped key_skills -> the canonical name used by SKILL_WEIGHTS and the skill tables.
+# Only merge true synonyms here; every change rescores jobs (it is part of score_jobs.WEIGHTS_VERSION).
+SKILL_ALIASES = {
+    # Frontend
+    "js": "javascript", "core javascript": "javascript", "java script": "javascript",
+    "react.js": "react", "reactjs": "react", "react js": "react", "react. js": "react", "reacts js": "react",
+    "angularjs": "angular", "angular.js": "angular", "angular js": "angular",
+    "vue.js": "vue", "vuejs": "vue", "nextjs": "next.js", "next js": "next.js",
+    "html5": "html", "css3": "css", "front end": "frontend", "front-end": "frontend",
+    "node": "node.js", "nodejs": "node.js", "node js": "node.js",
+    # Backend / systems
+    "go lang": "golang", "go": "golang", "postgres": "postgresql", "postgre sql": "postgresql",
+    "c sharp": "c#", "cpp": "c++", "micro services": "microservices", "microservice": "microservices",
+    "microservices architecture": "microservices", "distributed system": "distributed systems",
+    "distributed computing": "distributed systems", "system designing": "system design",
+    "back end": "backend", "back-end": "backend", "restful": "rest", "rest api": "rest", "restful api": "rest",
+    # Cloud / DevOps
+    "amazon web services": "aws", "amazon aws": "aws", "aws cloud": "aws",
+    "microsoft azure": "azure", "azure cloud": "azure",
+    "google cloud": "gcp", "google cloud platform": "gcp", "google cloud platforms": "gcp", "gcp cloud": "gcp",
+    "k8s": "kubernetes", "kubernates": "kubernetes", "ci cd": "ci/cd", "cicd": "ci/cd",
+    "ci/cd pipeline": "ci/cd", "ci cd pipeline": "ci/cd", "continuous integration": "ci/cd",
+    # Data / AI
+    "ml": "machine learning", "dl": "deep learning", "natural language processing": "nlp",
+    "gen ai": "generative ai", "genai": "generative ai", "llms": "llm", "large language models": "llm",
+    "apache spark": "spark", "apache kafka": "kafka", "apache airflow": "airflow",
+    # General
+    "agile methodology": "agile", "agile methodologies": "agile", "agile development": "agile",
+    "communication skills": "communication",
+}
+
+
+def normalize_skill(raw: str) -> str:
+    """Lowercase, trim and collapse whitespace; trailing punctuation is dropped ("PostgreSQL." -> "postgresql")."""
+    text = " ".join((raw or "").lower().split())
+    return re.sub(r"[.,;:]+$", "", text)
+
+
+def canonical_skill(raw: str) -> str:
+    text = normalize_skill(raw)
+    return SKILL_ALIASES.get(text, text)
+
+
+class SkillDictionary:
+    """
+    Interns canonical skill names to small integer IDs (1, 2, 3, ... in first-seen
+    order). Spellings listed in SKILL_ALIASES share their canonical skill's ID.
+
+    IDs are only stable across processes when the dictionary is loaded from the
+    same rows (see normalize_skills.py, which keeps them in the skill_dictionary table).
+    """
+
+    def __init__(self, names=None):
+        self._names = [None]  # index = skill_id; 0 is never assigned
+        self._ids = {}
+        self._lock = threading.Lock()
+        for skill_id, name in sorted((names or {}).items()):
+            self._register(name, skill_id)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _register(self, name, skill_id):
+        while len(self._names) <= skill_id:
+            self._names.append(None)
+        self._names[skill_id] = name
+        self._ids[name] = skill_id
+
+    def id_for(self, raw: str):
+        """The ID of a raw skill's canonical name, or None if it was never interned."""
+        return self._ids.get(canonical_skill(raw))
+
+    def intern(self, raw: str):
+        name = canonical_skill(raw)
+        if not name:
+            return None
+        skill_id = self._ids.get(name)
+        if skill_id is None:
+            with self._lock:
+                skill_id = self._ids.get(name)
+                if skill_id is None:
+                    skill_id = len(self._names)
+                    self._register(name, skill_id)
+        return skill_id
+
+    def intern_all(self, raw_skills) -> list:
+        """Distinct IDs for a job's skills, in ascending order."""
+        ids = {self.intern(raw) for raw in raw_skills or () if raw}
+        ids.discard(None)
+        return sorted(ids)
+
+    def name_of(self, skill_id: int) -> str:
+        return self._names[skill_id]
+
+    def has_id(self, skill_id: int) -> bool:
+        return 0 < skill_id < len(self._names) and self._names[skill_id] is not None
+
+    def items(self):
+        return [(skill_id, name) for skill_id, name in enumerate(self._names) if name is not None]
+
+    @classmethod
+    def load(cls, client, table="skill_dictionary"):
+        """Reads the persisted (skill_id, name) rows written by normalize_skills.py."""
+        names = {}
+        for rows in iter_job_batches(client, "skill_id, name", table=table, key="skill_id"):
+            names.update((row['skill_id'], row['name']) for row in rows)
+        return cls(names)
@@ -0,0 +1,204 @@
+import os
+import json
+import argparse
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from supabase import create_client, Client
+
+from job_io import iter_job_batches, BulkWriter, FingerprintStore
+from skill_dictionary import SkillDictionary, canonical_skill
+
+# 1. SETUP
+load_dotenv()
+url = os.getenv("SUPABASE_URL")
+key = os.getenv("SUPABASE_KEY") # Must be Service Role Key
+
+if not url or not key:
+    raise ValueError("Missing credentials")
+
+supabase: Client = create_client(url, key)
+
+# 2. SUMMARY TABLES
+# Read by CareerPath instead of aggregating the jobs table on every page view:
+#
+#   create table category_stats (
+#       role_category text primary key,
+#       job_count int, avg_target_score real,
+#       p10 int, p25 int, p50 int, p75 int, p90 int,
+#       refreshed_at timestamptz
+#   );
+#   create table category_skill_stats (
+#       role_category text, skill_name text, skill_id bigint,
+#       rank int, job_count int, share real,
+#       avg_target_score real, median_target_score int,
+#       refreshed_at timestamptz,
+#       primary key (role_category, skill_name)
+#   );
+
+STATS_COLUMNS = "job_id, role_category, skills_array, target_score"
+PERCENTILES = (10, 25, 50, 75, 90)
+TOP_SKILLS = 50  # per category; rows below this rank are deleted on refresh
+
+# 3. AGGREGATION
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-pct * len(sorted_values) // 100))  # ceil without floats
+    return sorted_values[rank - 1]
+
+def job_contribution(job, dictionary=None):
+    """
+    What one job adds to the aggregates: (category, score, distinct canonical skills).
+    With the persisted dictionary, names come from the job's skill_ids when it has them.
+    """
+    skill_ids = job.get('skill_ids')
+    if dictionary is not None and skill_ids is not None and all(map(dictionary.has_id, skill_ids)):
+        skills = sorted(dictionary.name_of(i) for i in skill_ids)
+    else:
+        skills = sorted({canonical_skill(s) for s in job.get('skills_array') or [] if s} - {""})
+    return [job.get('role_category') or "Uncategorized", job.get('target_score'), skills]
+
+def summarize(contributions, skill_names, skill_ids, refreshed_at, top_n=TOP_SKILLS):
+    """
+    One pass over (category, score, skills) triples -> (category rows, skill rows).
+    Jobs without a score still count towards skill frequency.
+    """
+    by_category = {}
+    for category, score, skills in contributions:
+        agg = by_category.setdefault(category, {"jobs": 0, "scores": [], "skills": {}})
+        agg["jobs"] += 1
+        if score is not None:
+            agg["scores"].append(score)
+        for skill in skills:
+            counts = agg["skills"].setdefault(skill, [0, []])
+            counts[0] += 1
+            if score is not None:
+                counts[1].append(score)
+
+    category_rows, skill_rows = [], []
+    for category, agg in by_category.items():
+        scores = sorted(agg["scores"])
+        row = {
+            "role_category": category,
+            "job_count": agg["jobs"],
+            "avg_target_score": round(sum(scores) / len(scores), 1) if scores else None,
+            "refreshed_at": refreshed_at,
+        }
+        for pct in PERCENTILES:
+            row[f"p{pct}"] = percentile(scores, pct)
+        category_rows.append(row)
+
+        top = sorted(agg["skills"].items(), key=lambda item: (-item[1][0], item[0]))[:top_n]
+        for rank, (skill, (count, skill_scores)) in enumerate(top, start=1):
+            skill_scores.sort()
+            skill_rows.append({
+                "role_category": category,
+                "skill_name": skill_names.get(skill, skill),
+                "skill_id": skill_ids.get(skill),
+                "rank": rank,
+                "job_count": count,
+                "share": round(count / agg["jobs"], 4),
+                "avg_target_score": round(sum(skill_scores) / len(skill_scores), 1) if skill_scores else None,
+                "median_target_score": percentile(skill_scores, 50),
+                "refreshed_at": refreshed_at,
+            })
+    return category_rows, skill_rows
+
+def load_skill_names():
+    """Canonical name -> (display name, id) from the skills table, so rows link to tests."""
+    names, ids = {}, {}
+    for rows in iter_job_batches(supabase, "id, name", table="skills", key="id"):
+        for row in rows:
+            if row.get('name'):
+                names[canonical_skill(row['name'])] = row['name']
+                ids[canonical_skill(row['name'])] = row['id']
+    return names, ids
+
+# 4. EXECUTION
+
+def run_skill_stats(batch_size=1000, state_path="pipeline_state.db", full=False, top_n=TOP_SKILLS,
+                    use_skill_ids=False):
+    """
+    Refreshes category_stats and category_skill_stats.
+
+    The jobs table is streamed once (four columns). Each job's contribution is
+    remembered locally, so only categories that gained, lost or changed a job
+    since the last run are recomputed and rewritten; with full=True every
+    category is. With use_skill_ids=True, jobs normalized by normalize_skills.py
+    are read from their skill_ids column instead of re-canonicalizing skills_array.
+    """
+    state = FingerprintStore(state_path, namespace="skill_stats")
+    previous = {job_id: json.loads(value) for job_id, value in state.items()}
+    changed = {}
+    seen = set()
+    dirty = set()
+
+    columns, dictionary = STATS_COLUMNS, None
+    if use_skill_ids:
+        dictionary = SkillDictionary.load(supabase)
+        columns += ", skill_ids"
+
+    print("Streaming jobs...")
+    for jobs in iter_job_batches(supabase, columns, batch_size=batch_size):
+        for job in jobs:
+            seen.add(job['job_id'])
+            contribution = job_contribution(job, dictionary)
+            old = previous.get(job['job_id'])
+            if old != contribution:
+                changed[job['job_id']] = contribution
+                dirty.add(contribution[0])
+                if old:
+                    dirty.add(old[0])
+
+    removed = [job_id for job_id in previous if job_id not in seen]
+    dirty.update(previous[job_id][0] for job_id in removed)
+    print(f"{len(seen)} jobs: {len(changed)} new or changed, {len(removed)} removed")
+
+    current = previous
+    for job_id in removed:
+        del current[job_id]
+    current.update(changed)
+
+    categories = {c[0] for c in current.values()} if full else dirty
+    if not categories:
+        print("Skill stats are up to date.")
+        state.close()
+        return
+
+    skill_names, skill_ids = load_skill_names()
+    refreshed_at = datetime.now(timezone.utc).isoformat()
+    category_rows, skill_rows = summarize(
+        (c for c in current.values() if c[0] in categories), skill_names, skill_ids, refreshed_at, top_n
+    )
+
+    failed = 0
+    for table, rows in (('category_stats', category_rows), ('category_skill_stats', skill_rows)):
+        with BulkWriter(supabase, table, label=table) as writer:
+            writer.add(rows)
+        failed += writer.failed
+    if failed:
+        print("Some rows failed; keeping the local state so the next run retries these categories.")
+        state.close()
+        return
+
+    # Drop skills that fell out of a category's top list, and categories that emptied
+    for category in categories:
+        supabase.table('category_skill_stats').delete().eq('role_category', category).lt('refreshed_at', refreshed_at).execute()
+        supabase.table('category_stats').delete().eq('role_category', category).lt('refreshed_at', refreshed_at).execute()
+
+    state.delete_many(removed)
+    state.put_many({job_id: json.dumps(c) for job_id, c in changed.items()})
+    state.close()
+    print(f"Refreshed {len(category_rows)} categories ({len(skill_rows)} skill rows).")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute per-category skill demand and score distributions.")
+    parser.add_argument("--full", action="store_true", help="recompute every category, not just the changed ones")
+    parser.add_argument("--top", type=int, default=TOP_SKILLS, help="skills kept per category")
+    parser.add_argument("--state", default="pipeline_state.db", help="local file remembering each job's contribution")
+    parser.add_argument("--use-skill-ids", action="store_true",
+                        help="read skills from the skill_ids column written by normalize_skills.py")
+    args = parser.parse_args()
+    run_skill_stats(state_path=args.state, full=args.full, top_n=args.top, use_skill_ids=args.use_skill_ids)
@@ -0,0 +1,34 @@
+# Shared by score_jobs.py (job difficulty) and the API's skill matching (user/job overlap)
+from skill_dictionary import canonical_skill
+
+# High Value Skills (High Demand / Lower Supply / High Complexity)
+SKILL_WEIGHTS = {
+    # AI/ML/Data - Worth 25 pts
+    "tensorflow": 25, "pytorch": 25, "machine learning": 25, "deep learning": 25,
+    "nlp": 25, "computer vision": 25, "llm": 28, "generative ai": 28,
+    "spark": 22, "hadoop": 20, "kafka": 22, "airflow": 20,
+    
+    # Cloud/DevOps - Worth 22 pts
+    "kubernetes": 25, "docker": 15, "aws": 18, "azure": 18, "gcp": 18,
+    "terraform": 22, "ansible": 18, "jenkins": 15, "ci/cd": 15,
+    
+    # Backend/Systems - Worth 18 pts
+    "rust": 25, "golang": 20, "go": 20, "c++": 20, "java": 15, "c#": 15,
+    "microservices": 20, "distributed systems": 25, "system design": 25,
+    "graphql": 18, "redis": 15, "postgres": 15, "postgresql": 15,
+    
+    # Frontend - Worth 12 pts
+    "react": 12, "angular": 12, "vue": 12, "typescript": 14, "next.js": 14,
+    "redux": 10, "javascript": 10, "html": 5, "css": 5,
+    
+    # General - Worth 8 pts
+    "python": 12, "agile": 5, "scrum": 5, "communication": 5, "git": 8
+}
+
+DEFAULT_SKILL_WEIGHT = 8
+
+def skill_weight(skill):
+    # Aliases ("React.js", "ReactJS") resolve to the weighted canonical name
+    s_clean = canonical_skill(skill)
+    # Default points for unknown skills
+    return SKILL_WEIGHTS.get(s_clean, DEFAULT_SKILL_WEIGHT)
@@ -66,10 +66,14 @@ function CareerPath() {
     const analyzePath = async (role) => {
         setLoading(true);
         try {
-            // A. Get Market Data (RPC call)
-            const { data: topSkills } = await supabase.rpc('get_category_skills', { 
-                target_category: role 
-            });
+            // A. Get Market Data (precomputed by skill_stats.py)
+            const { data: topSkills } = await supabase
+                .from('category_skill_stats')
+                .select('skill_id, skill_name, job_count, share, avg_target_score')
+                .eq('role_category', role)
+                .not('skill_id', 'is', null) // only skills that have a test
+                .order('rank', { ascending: true })
+                .limit(10);
 
             // B. Get User's Verified Skills & Scores
             const { data: mySkills } = await supabase
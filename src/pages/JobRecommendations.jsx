@@ -7,6 +7,8 @@ import { IonIcon } from '@ionic/react';
 import { briefcaseOutline, checkmarkCircle, alertCircleOutline, arrowForward } from 'ionicons/icons';
 import ThemeToggle from '../components/ThemeToggle/ThemeToggle';
 
+const API_URL = import.meta.env.VITE_API_URL || "http://127.0.0.1:8000";
+
 function JobRecommendations() {
     const { user } = useAuth();
     const navigate = useNavigate();
@@ -33,6 +35,7 @@ function JobRecommendations() {
                     .ilike('name', skillName)
                     .single();
 
+                let bestScore = 0;
                 if (skillData) {
                     const { data: scoreData } = await supabase
                         .from('test_results')
@@ -43,19 +46,24 @@ function JobRecommendations() {
                         .limit(1)
                         .single();
                     
-                    if (scoreData) setUserScore(scoreData.score);
+                    if (scoreData) {
+                        bestScore = scoreData.score;
+                        setUserScore(bestScore);
+                    }
                 }
 
                 // 2. Get Jobs to Plot (A mix of levels)
-                // We want some below the user, some matching, some above (Reach)
-                const { data: jobsData } = await supabase
-                    .from('jobs')
-                    .select('job_id, title, company, target_score, seniority_level')
-                    .contains('skills_array', [skillName]) // Filter by skill
-                    .order('target_score', { ascending: true })
-                    .limit(50); // Fetch a batch to pick representatives from
-
-                setJobs(jobsData || []);
+                // The API returns the jobs listing this skill closest to the user's score, already
+                // sorted by target_score and tagged Qualified / Reach / Gap
+                const response = await fetch(`${API_URL}/recommend_jobs`, {
+                    method: "POST",
+                    headers: { "Content-Type": "application/json" },
+                    body: JSON.stringify({ score: bestScore, skill: skillName, radius: 1000, limit: 50 })
+                });
+                if (!response.ok) throw new Error("Failed to load job recommendations");
+                const data = await response.json();
+
+                setJobs(data.jobs || []);
 
             } catch (err) {
                 console.error("Error fetching data:", err);
@@ -80,13 +88,9 @@ function JobRecommendations() {
 
     const chartMarkers = getChartMarkers();
 
-    // Helper: Determine "Gap" or "Match"
-    const getMatchStatus = (jobScore) => {
-        const diff = userScore - jobScore;
-        if (diff >= -50) return { label: "Qualified", class: "match-good" }; // User is equal or better
-        if (diff >= -150) return { label: "Reach", class: "match-reach" };   // User is close
-        return { label: "Gap", class: "match-gap" };                         // User is far
-    };
+    // Helper: Map the API's "Gap" / "Match" status to a card style
+    const STATUS_CLASSES = { Qualified: "match-good", Reach: "match-reach", Gap: "match-gap" };
+    const getMatchStatus = (job) => ({ label: job.status, class: STATUS_CLASSES[job.status] });
 
     if (loading) return <div className="job-rec-container loading">Scanning Industry Data...</div>;
 
@@ -152,7 +156,7 @@ function JobRecommendations() {
                     <h2>Available Roles</h2>
                     <div className="jobs-grid">
                         {jobs.slice(0, 10).map((job) => {
-                            const status = getMatchStatus(job.target_score);
+                            const status = getMatchStatus(job);
                             return (
                                 <div key={job.job_id} className={`job-card ${status.class}`}>
                                     <div className="job-score-badge" title="Difficulty Score">{job.target_score}</div>